@@ -20,10 +20,25 @@ DATABASE_PASSWORD: str = config("DATABASE_PASSWORD", default="postgres")
 DATABASE_HOST: str = config("DATABASE_HOST", default="localhost")
 DATABASE_PORT: str = config("DATABASE_PORT", default="5432")
 DATABASE_NAME: str = config("DATABASE_NAME", default="randomall")
+DATABASE_POOL_MIN_SIZE: int = config("DATABASE_POOL_MIN_SIZE", cast=int, default=10)
+DATABASE_POOL_MAX_SIZE: int = config("DATABASE_POOL_MAX_SIZE", cast=int, default=10)
+DATABASE_STATEMENT_CACHE_SIZE: int = config(
+    "DATABASE_STATEMENT_CACHE_SIZE", cast=int, default=100
+)
+DATABASE_MAX_INACTIVE_CONNECTION_LIFETIME: float = config(
+    "DATABASE_MAX_INACTIVE_CONNECTION_LIFETIME", cast=float, default=300.0
+)
 
 # Cache
 CACHE_URL: str = config("CACHE_URL", default="redis://localhost:6379/")
 
+# gunicorn workers (gunicorn reads it too), local rate limit shares
+WEB_CONCURRENCY: int = config("WEB_CONCURRENCY", cast=int, default=1)
+
+# Background queue
+BACKGROUND_WORKERS: int = config("BACKGROUND_WORKERS", cast=int, default=4)
+BACKGROUND_QUEUE_SIZE: int = config("BACKGROUND_QUEUE_SIZE", cast=int, default=1000)
+
 # Auth
 JWT_ALGORITHM = "EdDSA"
 with open("./ed25519_2.key", "r") as f:
@@ -37,6 +37,10 @@ class AbstractEngine(ABC):
     async def generate(self):
         raise NotImplementedError
 
+    @abstractmethod
+    async def generate_many(self, n: int):
+        raise NotImplementedError
+
     @abstractmethod
     async def create(self):
         raise NotImplementedError
@@ -68,7 +72,11 @@ class AbstractGenerator(ABC):
         raise NotImplementedError
 
     @abstractmethod
-    def generate(self, body) -> str:
+    def compile(self, body):
+        raise NotImplementedError
+
+    @abstractmethod
+    def generate(self, plan) -> str:
         raise NotImplementedError
 
     @abstractmethod
@@ -1,6 +1,7 @@
-import copy
+import bisect
+import itertools
 import random
-from typing import Any, List
+from typing import Any, Dict, List, Optional, Set
 
 from pydantic import ValidationError
 
@@ -17,6 +18,7 @@ from app.core.blocks.middlewares.list import ListMiddleware
 from app.core.blocks.middlewares.multiply import MultiplyMiddleware
 from app.core.blocks.middlewares.num import NumMiddleware
 from app.core.blocks.middlewares.variations import VariationsMiddleware
+from app.core.blocks.plan import CompiledExceptions, Plan
 from app.core.blocks.validator import BodyValidation, FormatValidation
 
 
@@ -45,13 +47,27 @@ def _tie(block: Block, choice: str) -> str:
     return f"{block.before}{choice}{block.after}{end}"
 
 
-def _choose(block: Block) -> str:
+def _weighted_choice(content: List[str], cum_weights: List[int]) -> str:
     """
+    Same draw as random.choices(content, cum_weights=cum_weights), but
+    without its argument checks: O(log n) per draw.
+    Zero weight can't be chosen, its cum weight equals the previous one.
+
     https://bugs.python.org/issue38881
         if all weights are 0:
         for python 3.9 random.choices raises ValueError
         for python 3.8 random.choices returns last element
+    We always raise ValueError.
     """
+    total = cum_weights[-1]
+    if total <= 0:
+        raise ValueError
+
+    hi = len(cum_weights) - 1
+    return content[bisect.bisect(cum_weights, random.random() * total, 0, hi)]
+
+
+def _choose(block: Block) -> str:
     if not block.vars:
         return block.content
 
@@ -63,9 +79,11 @@ def _choose(block: Block) -> str:
             choice = ""
     else:
         try:
-            # if all(v == 0 for v in block.weights):  # type: ignore
-            #     return ""
-            choice = random.choices(block.content, weights=block.weights, k=1)[0]  # type: ignore
+            cum_weights = getattr(block, "cum_weights", None)
+            if cum_weights is None:
+                cum_weights = list(itertools.accumulate(block.weights))  # type: ignore
+                block.cum_weights = cum_weights  # type: ignore
+            choice = _weighted_choice(block.content, cum_weights)  # type: ignore
         except (ValueError, IndexError):
             return ""
     if block.cap:
@@ -88,6 +106,73 @@ def _choose_and_cap(block: Block) -> str:
     return choice
 
 
+def _positions(block: Block) -> Dict[str, List[int]]:
+    """
+    Lowercased variant -> its indexes in content.
+    Plan passes it in for blocks with fixed content,
+    otherwise it's built on first use and kept on the block.
+    """
+    positions = getattr(block, "positions", None)
+    if positions is None:
+        positions = {}
+        for i, v in enumerate(block.content):
+            positions.setdefault(v.lower(), []).append(i)
+        block.positions = positions  # type: ignore
+    return positions
+
+
+def _choose_excluding(block: Block, excluded: Optional[Set[int]]) -> str:
+    """
+    _choose_and_cap as if excluded variants were deleted from the block:
+    uniform (or by weight) among the rest, "" if nothing is left.
+    Block itself is not changed.
+    """
+    if not excluded or not block.vars:
+        return _choose_and_cap(block)
+
+    content: List[str] = block.content  # type: ignore
+    if block.multi:
+        weights: List[int] = block.weights  # type: ignore
+        cum_weights = getattr(block, "cum_weights", None)
+        if cum_weights is None:
+            cum_weights = list(itertools.accumulate(weights))
+            block.cum_weights = cum_weights  # type: ignore
+        total = cum_weights[-1] if len(cum_weights) > 0 else 0
+        left = total - sum(weights[i] for i in excluded)
+        if left <= 0:
+            return ""
+
+        if left * 2 >= total:
+            # rejection keeps the same odds, < 2 draws on average
+            while True:
+                i = bisect.bisect(
+                    cum_weights, random.random() * total, 0, len(content) - 1
+                )
+                if i not in excluded:
+                    break
+        else:
+            allowed = [i for i in range(len(content)) if i not in excluded]
+            i = random.choices(allowed, weights=[weights[j] for j in allowed])[0]
+    else:
+        left = len(content) - len(excluded)
+        if left <= 0:
+            return ""
+
+        if left * 2 >= len(content):
+            while True:
+                i = random.randrange(len(content))
+                if i not in excluded:
+                    break
+        else:
+            i = random.choice([i for i in range(len(content)) if i not in excluded])
+
+    choice = content[i]
+    if block.cap and len(choice) > 0:
+        return choice[:1].upper() + choice[1:]
+
+    return choice
+
+
 class BaseGenerator:
     def __init__(self, body: Body) -> None:
         self._body = body
@@ -136,41 +221,45 @@ class SequencesGenerator(BaseGenerator):
 
 
 class ExceptionsGenerator(BaseGenerator):
-    def _delete_same(self, blocks: List[Block], choice: str, e: int) -> None:
-        """NOTE: Mutates blocks!"""
-
-        # blocks, "b", 2
+    """
+    Body is only read, per draw state is local to generate,
+    so one body can serve any number of draws.
+    """
 
-        block = blocks[e - 1]  # ["b", "d", "e"]
-        if not block.vars:  # TODO: test
+    def __init__(
+        self,
+        body: Body,
+        exceptions: Optional[CompiledExceptions] = None,
+    ) -> None:
+        super().__init__(body)
+        if exceptions is None:
+            exceptions = CompiledExceptions(body.exceptions)
+        self._exceptions = exceptions
+
+    def _exclude_same(
+        self,
+        blocks: List[Block],
+        excluded: Dict[int, Set[int]],
+        choice: str,
+        e: int,
+    ) -> None:
+        """
+        Excludes variants equal to choice (case insensitive) from block e
+        for the rest of this draw. Blocks are not changed.
+        """
+        block = blocks[e - 1]
+        if not block.vars:
             return
 
-        indexes_to_remove = []
-        # TODO: case insensitive to tutorial
-        if len(choice) > 0:
-            w = choice.lower()
-        else:
-            w = ""
-
-        low_content = [v.lower() for v in copy.deepcopy(block.content)]
-
-        for i, v in enumerate(low_content):
-            if v == w:
-                indexes_to_remove.append(i)
-
-        if block.multi:
-            block.weights = [  # type: ignore
-                weight if i not in indexes_to_remove else 0
-                for i, weight in enumerate(block.weights)  # type: ignore
-            ]
-        else:
-            block.content = [  # type: ignore
-                v for i, v in enumerate(block.content) if i not in indexes_to_remove
-            ]
+        indexes = _positions(block).get(choice.lower())
+        if indexes:
+            excluded.setdefault((e - 1) % len(blocks), set()).update(indexes)
 
     def generate(self):
         blocks = self._body.blocks
-        exceptions = self._body.exceptions
+        targets = self._exceptions.targets
+        # block index -> excluded variant indexes, per draw
+        excluded: Dict[int, Set[int]] = {}
         results = []
 
         # blocks = [["a", "b", "c"], ["b", "d", "e"]]
@@ -178,46 +267,31 @@ class ExceptionsGenerator(BaseGenerator):
         # NOTE: "b" in both
 
         for i, block in enumerate(blocks, 1):
-            # i_1 = 1
-            # block_1 = ["a", "b", "c"]
-
-            # i_2 = 2
-            # block_2 = ["d", "e"]
-
-            exceptions_copy = copy.deepcopy(exceptions)  # [[1, 2]]
-
-            choice = _choose_and_cap(block)  # ["b"]
-            tied_choice = _tie(block, choice)
-
-            results.append(tied_choice)
+            choice = _choose_excluding(block, excluded.get(i - 1))  # "b"
+            results.append(_tie(block, choice))
 
-            for exception in exceptions_copy:
-                # exception_1 = [1, 2]
-                if i in exception:  # 1 in [1,2] - True
-                    exception.remove(i)  # [2]
-                    for e in exception:
-                        self._delete_same(blocks, choice, e)  # blocks, "b", 2
+            for e in targets.get(i, ()):
+                self._exclude_same(blocks, excluded, choice, e)  # "b" from 2
 
         return "".join(results)
 
 
 class AdvancedGenerator(ExceptionsGenerator):
     def generate(self) -> str:
-        sequences = self._body.sequences
-        exceptions = self._body.exceptions
+        sequence = random.choice(self._body.sequences)
+        blocks = self._body.blocks
+        exceptions = self._exceptions
+        # per draw scratch: used up exception members, excluded variants
+        used = exceptions.scratch()
+        excluded: Dict[int, Set[int]] = {}
 
         results = []
-
-        sequence = random.choice(sequences)
-        # blocks = copy.deepcopy(self._data.blocks)
-        blocks = self._body.blocks
         for s in sequence:
-            choice = _choose_and_cap(blocks[s - 1])
-            for exception in exceptions:
-                if s in exception:
-                    exception.remove(s)
-                    for e in exception:
-                        self._delete_same(blocks, choice, e)
+            choice = _choose_excluding(
+                blocks[s - 1], excluded.get((s - 1) % len(blocks))
+            )
+            for e in exceptions.consume(used, s):
+                self._exclude_same(blocks, excluded, choice, e)
 
             tied_choice = _tie(blocks[s - 1], choice)
             results.append(tied_choice)
@@ -225,20 +299,19 @@ class AdvancedGenerator(ExceptionsGenerator):
 
     def test(self) -> str:
         sequences = self._body.sequences
-        exceptions = self._body.exceptions
+        blocks = self._body.blocks
+        targets = self._exceptions.targets
 
         results = []
         for i, sequence in enumerate(sequences, 1):
-            blocks = copy.deepcopy(self._body.blocks)  # a, b*10, c*50, d*200, d*300
+            excluded: Dict[int, Set[int]] = {}
             sequence_result = [f"{i}. "]
-            for s in sequence:  # 1, 1, 1, 1
-                exceptions_copy = copy.deepcopy(exceptions)
-                choice = _choose_and_cap(blocks[s - 1])
-                for exception in exceptions_copy:
-                    if s in exception:
-                        exception.remove(s)
-                        for e in exception:
-                            self._delete_same(blocks, choice, e)
+            for s in sequence:
+                choice = _choose_excluding(
+                    blocks[s - 1], excluded.get((s - 1) % len(blocks))
+                )
+                for e in targets.get(s, ()):
+                    self._exclude_same(blocks, excluded, choice, e)
 
                 tied_choice = _tie(blocks[s - 1], choice)
                 sequence_result.append(tied_choice)
@@ -248,6 +321,10 @@ class AdvancedGenerator(ExceptionsGenerator):
 
 
 class Generator(AbstractGenerator):
+    # NUM() and multiply are parsed by Plan
+    compile_middlewares = [
+        ListMiddleware(),
+    ]
     preprocess_middlewares = [
         ListMiddleware(),
         NumMiddleware(),
@@ -262,7 +339,11 @@ class Generator(AbstractGenerator):
         VariationsMiddleware(),
     ]
 
-    def _get_generator(self, body: Body) -> BaseGenerator:
+    def _get_generator(
+        self,
+        body: Body,
+        exceptions: Optional[CompiledExceptions] = None,
+    ) -> BaseGenerator:
         has_sequences = len(body.sequences) > 0
         has_exceptions = len(body.exceptions) > 0
 
@@ -271,13 +352,15 @@ class Generator(AbstractGenerator):
         elif has_sequences and not has_exceptions:
             return SequencesGenerator(body)
         elif not has_sequences and has_exceptions:
-            return ExceptionsGenerator(body)
+            return ExceptionsGenerator(body, exceptions)
         else:
-            return AdvancedGenerator(body)
+            return AdvancedGenerator(body, exceptions)
 
-    def generate(self, body: Body) -> str:
-        _split_content(body.blocks)
-        return self._get_generator(body).generate()
+    def compile(self, body: Body) -> Plan:
+        return Plan(body)
+
+    def generate(self, plan: Plan) -> str:
+        return self._get_generator(plan.body(), plan.compiled_exceptions).generate()
 
     def test(self, body: Body) -> str:
         _split_content(body.blocks)
@@ -1,32 +1,113 @@
-import copy
 import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from app.config import LANGUAGE
 from app.core.abc import AbstractEngine
-from app.entities.lists import ListAccess
+from app.entities.lists import ListAccess, ListEntity
 
-FUNC_PATTERN = re.compile(r"(LIST\(([0-9]+)*\))$")
+FUNC_PATTERN = re.compile(r"LIST\(([0-9]+)\)")
 
 
 class ListMiddleware:
+    """
+    Replaces LIST(id) variants with the variants of the list,
+    LIST(id) in a list is replaced the same way.
+    Lists are fetched level by level, one batch per level
+    (lists_repo.get_many), each list once per body.
+    """
+
+    # levels of nested lists, LIST(id) deeper than that is left as is
+    max_depth: int = 5
+
     async def __call__(self, engine: AbstractEngine, **kwargs) -> None:
-        for block in engine.body.blocks:
-            variants = [v.strip() for v in block.content.split(block.slicer)]
-            variants_copy = copy.deepcopy(variants)
-            for v in variants_copy:
-                for match in re.findall(FUNC_PATTERN, v):
-                    try:
-                        id = int(match[1])
-                        list_variants = await self.get_content(engine, id)
-                        variants_copy.remove(match[0])
-                        variants_copy.extend(list_variants)
-                    except ValueError:
-                        pass
-
-            block.content = block.slicer.join(variants_copy)
-
-    async def get_content(self, engine: AbstractEngine, id: int) -> list[str]:
-        entity = await engine.lists_repo.get(id)
+        # block -> (its other variants, list ids in order)
+        parsed = [
+            self._parse(v.strip() for v in block.content.split(block.slicer))
+            for block in engine.body.blocks
+        ]
+
+        # list id -> (its other variants, list ids in order)
+        lists: Dict[int, Tuple[List[str], List[int]]] = {}
+        level: Dict[int, None] = {id: None for _, refs in parsed for id in refs}
+        for _ in range(self.max_depth):
+            if len(level) == 0:
+                break
+
+            entities = await engine.lists_repo.get_many(level)
+            next_level: Dict[int, None] = {}
+            for id in level:
+                lists[id] = self._parse(self.get_content(engine, id, entities.get(id)))
+                for ref in lists[id][1]:
+                    if ref not in lists and ref not in level:
+                        next_level[ref] = None
+            level = next_level
+
+        expanded: Dict[int, List[str]] = {}
+        for block, (variants, refs) in zip(engine.body.blocks, parsed):
+            for id in refs:
+                variants.extend(self._expand(id, lists, expanded, set())[0])
+            block.content = block.slicer.join(variants)
+
+    def _parse(self, variants: Iterable[str]) -> Tuple[List[str], List[int]]:
+        """Splits variants into other variants and LIST() ids in order"""
+        other = []
+        refs = []
+        for v in variants:
+            match = FUNC_PATTERN.fullmatch(v) if "LIST(" in v else None
+            if match is None:
+                other.append(v)
+            else:
+                refs.append(int(match.group(1)))
+        return other, refs
+
+    def _expand(
+        self,
+        id: int,
+        lists: Dict[int, Tuple[List[str], List[int]]],
+        expanded: Dict[int, List[str]],
+        path: Set[int],
+    ) -> Tuple[List[str], bool]:
+        """
+        Variants of list id followed by the variants of the lists it
+        references. A list that is already being expanded (on path) stops
+        there: its variants are in the result once.
+        Returns True too if that happened, the result depends on path
+        then and is not kept in expanded.
+        """
+        if id not in lists:
+            # deeper than max_depth
+            return [f"LIST({id})"], False
+
+        if id in expanded:
+            return expanded[id], False
+
+        variants, refs = lists[id]
+        if len(refs) == 0:
+            return variants, False
+
+        content = list(variants)
+        cut = False
+        path.add(id)
+        for ref in refs:
+            if ref in path:
+                cut = True
+                continue
+
+            ref_content, ref_cut = self._expand(ref, lists, expanded, path)
+            content.extend(ref_content)
+            cut = cut or ref_cut
+        path.discard(id)
+
+        if not cut:
+            expanded[id] = content
+        return content, cut
+
+    def get_content(
+        self,
+        engine: AbstractEngine,
+        id: int,
+        entity: Optional[ListEntity],
+    ) -> List[str]:
         if entity is None:
             if LANGUAGE == "RU":
                 return [f"__LIST({id})_ОШИБКА_СПИСКА_НЕ_СУЩЕСТВУЕТ__"]
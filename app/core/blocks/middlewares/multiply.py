@@ -1,3 +1,4 @@
+import itertools
 import re
 
 from app.core.abc import AbstractEngine
@@ -6,41 +7,46 @@ MULTIPLY_PATTERN = re.compile(r"(.+)?\*(\d+)$")
 MAX_WEIGHT = 10_000
 
 
-class MultiplyMiddleware:
-    def __call__(self, engine: AbstractEngine, **kwargs) -> None:
-        for block in engine.body.blocks:
-            if "*" not in block.content:
-                continue
+def split_weights(variants: list[str]) -> tuple[list[str], list[int], bool]:
+    values: list[str] = []
+    weights: list[int] = []
+    is_multi = False
+    for v in variants:
+        match = re.match(MULTIPLY_PATTERN, v)
+        if match is None:
+            weights.append(1)
+            values.append(v)
+            continue
+
+        value = match.group(1)
+        weight = int(match.group(2))
 
-            variants = block.content.split(block.slicer)
+        if value is None:
+            value = ""
 
-            values: list[str] = []
-            weights: list[int] = []
-            is_multi = False
-            for v in variants:
-                match = re.match(MULTIPLY_PATTERN, v)
-                if match is None:
-                    weights.append(1)
-                    values.append(v)
-                    continue
+        if weight <= 0:
+            weight = 0
 
-                value = match.group(1)
-                weight = int(match.group(2))
+        if weight > MAX_WEIGHT:
+            weight = MAX_WEIGHT
 
-                if value is None:
-                    value = ""
+        values.append(value)
+        weights.append(weight)
+        is_multi = True
 
-                if weight <= 0:
-                    weight = 0
+    return values, weights, is_multi
 
-                if weight > MAX_WEIGHT:
-                    weight = MAX_WEIGHT
 
-                values.append(value)
-                weights.append(weight)
-                is_multi = True
+class MultiplyMiddleware:
+    def __call__(self, engine: AbstractEngine, **kwargs) -> None:
+        for block in engine.body.blocks:
+            if "*" not in block.content:
+                continue
+
+            values, weights, is_multi = split_weights(block.content.split(block.slicer))
 
             if is_multi:
                 block.content = block.slicer.join(values)
                 block.weights = weights  # type: ignore
+                block.cum_weights = list(itertools.accumulate(weights))  # type: ignore
                 block.multi = True
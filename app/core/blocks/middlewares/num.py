@@ -1,9 +1,9 @@
 import random
 import re
+from typing import List, Sequence, Tuple
 
 from app.core.abc import AbstractEngine
 
-FUNC_PATTERN = re.compile(r"(?=NUM\()[^)]*\)")
 NUMBERS_PATTERN = re.compile(r"-?\d+(?:\.|d+)?")
 MAGIC_NUMBER = 1_000_000_000_000
 
@@ -12,8 +12,12 @@ class NumError(Exception):
     pass
 
 
-def random_number(nums: list[int]) -> str:
-    nums = [int(n) for n in nums]
+def parse_numbers(match: str) -> list[int]:
+    """
+    Raises NumError or ValueError if NUM() is malformed.
+    Validity does not depend on the draw, so it can be checked once.
+    """
+    nums = [int(n) for n in re.findall(NUMBERS_PATTERN, match)]
 
     c = len(nums)
 
@@ -23,7 +27,7 @@ def random_number(nums: list[int]) -> str:
         and nums[0] < MAGIC_NUMBER
         and nums[1] < MAGIC_NUMBER
     ):
-        return str(random.randint(nums[0], nums[1]))
+        return nums
     elif (
         c == 3
         and (nums[0] < nums[1] and nums[2] > 0)
@@ -31,26 +35,81 @@ def random_number(nums: list[int]) -> str:
         and nums[1] < MAGIC_NUMBER
         and nums[2] < MAGIC_NUMBER
     ):
-        if nums[2] > nums[1]:
-            return str(nums[0])
-
-        steps = (nums[1] - nums[0]) // nums[2]
-        p = random.randint(0, steps)
-        return str(nums[0] + nums[2] * p)
+        return nums
     else:
         raise NumError
 
 
+def draw_number(nums: list[int]) -> str:
+    """NOTE: nums must be checked with parse_numbers"""
+    if len(nums) == 2:
+        return str(random.randint(nums[0], nums[1]))
+
+    if nums[2] > nums[1]:
+        return str(nums[0])
+
+    steps = (nums[1] - nums[0]) // nums[2]
+    p = random.randint(0, steps)
+    return str(nums[0] + nums[2] * p)
+
+
+def error_replacement(match: str) -> str:
+    replacement = f"__ERROR__{match}__ERROR__"
+    return replacement.replace(",", "__COMMA__")
+
+
+def tokenize(content: str) -> Tuple[List[str], List[list[int]]]:
+    """
+    Splits content into literal segments and NUM() slots in one pass:
+    segments[i] goes before slot i, segments[-1] after the last slot,
+    nums[i] are the parsed numbers of slot i.
+    NUM() is everything from "NUM(" to the next ")",
+    malformed ones are left in segments as error text.
+    """
+    segments: List[str] = []
+    nums: List[list[int]] = []
+    parts: List[str] = []
+    pos = 0
+    while True:
+        start = content.find("NUM(", pos)
+        if start == -1:
+            break
+        end = content.find(")", start)
+        if end == -1:
+            break
+        end += 1
+
+        parts.append(content[pos:start])
+        match = content[start:end].replace(" ", "")
+        try:
+            nums.append(parse_numbers(match))
+        except (ValueError, NumError):
+            parts.append(error_replacement(match))
+        else:
+            segments.append("".join(parts))
+            parts = []
+        pos = end
+
+    parts.append(content[pos:])
+    segments.append("".join(parts))
+    return segments, nums
+
+
+def fill(segments: Sequence[str], numbers: Sequence[str], start: int = 0) -> str:
+    """Segments from tokenize with numbers[start:] in their slots"""
+    parts = [segments[0]]
+    for i, segment in enumerate(segments[1:], start):
+        parts.append(numbers[i])
+        parts.append(segment)
+    return "".join(parts)
+
+
 class NumMiddleware:
     def __call__(self, engine: AbstractEngine, **kwargs) -> None:
         for block in engine.body.blocks:
-            for match in re.findall(FUNC_PATTERN, block.content):
-                match = match.replace(" ", "")
-                nums = [n for n in re.findall(NUMBERS_PATTERN, match)]
-                try:
-                    replacement = random_number(nums)
-                except (ValueError, NumError):
-                    replacement = f"__ERROR__{match}__ERROR__"
-                    replacement = replacement.replace(",", "__COMMA__")
-
-                block.content = re.sub(FUNC_PATTERN, replacement, block.content, 1)
+            segments, nums = tokenize(block.content)
+            if len(nums) == 0:
+                block.content = segments[0]
+                continue
+
+            block.content = fill(segments, [draw_number(n) for n in nums])
@@ -0,0 +1,245 @@
+import itertools
+import re
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from app.core.blocks.body import Block, Body
+from app.core.blocks.middlewares.multiply import split_weights
+from app.core.blocks.middlewares.num import draw_number, fill, tokenize
+
+# NUM() slot marker, private use area
+SLOT = "\ue000"
+# weight that depends on NUM(), e.g. "a*NUM(1,3)"
+NUM_WEIGHT_PATTERN = re.compile(rf"\*[0-9{SLOT}]*{SLOT}[0-9{SLOT}]*$")
+
+# literal segments and index of the first slot
+Template = Tuple[Tuple[str, ...], int]
+Value = Union[str, Template]
+
+
+def _tokenize(content: str) -> Tuple[str, List[List[int]]]:
+    """
+    Replaces valid NUM() with SLOT and returns their numbers in order.
+    Invalid NUM() become error text right away.
+    """
+    segments, nums = tokenize(content.replace(SLOT, ""))
+    return SLOT.join(segments), nums
+
+
+def _template(value: str, start: int) -> Tuple[Value, int]:
+    c = value.count(SLOT)
+    if c == 0:
+        return value, start
+
+    return (tuple(value.split(SLOT)), start), start + c
+
+
+def _fill(value: Value, numbers: List[str]) -> str:
+    if isinstance(value, str):
+        return value
+
+    segments, start = value
+    return fill(segments, numbers, start)
+
+
+class CompiledBlock:
+    """
+    Block after LIST(), NUM() and *N were parsed.
+    Shared between requests, so it's never mutated after __init__.
+    """
+
+    def __init__(self, block: Block, indexed: bool = False) -> None:
+        """
+        indexed - block is in exceptions, see generator._positions
+        """
+        self.vars = block.vars
+        self.before = block.before
+        self.slicer = block.slicer
+        self.cap = block.cap
+        self.after = block.after
+        self.end = block.end
+
+        tokenized, self.nums = _tokenize(block.content)
+        variants = tokenized.split(block.slicer)
+
+        self.dynamic = self._has_dynamic_weights(variants)
+        self.positions: Optional[Dict[str, List[int]]] = None
+        self.multi = False
+        self.weights: Optional[List[int]] = None
+        self.cum_weights: Optional[List[int]] = None
+
+        if self.dynamic:
+            self.content: Union[Value, List[Value]]
+            self.content, _ = _template(tokenized, 0)
+            return
+
+        if "*" in tokenized:
+            values, weights, is_multi = split_weights(variants)
+            if is_multi:
+                tokenized = block.slicer.join(values)
+                variants = values
+                self.multi = True
+                self.weights = weights
+                self.cum_weights = list(itertools.accumulate(weights))
+
+        if not self.vars:
+            self.content, _ = _template(tokenized, 0)
+            return
+
+        content = []
+        n = 0
+        for v in variants:
+            value, n = _template(v.strip(), n)
+            content.append(value)
+        self.content = content
+
+        # content with NUM() is different every draw, so is its index
+        if indexed and len(self.nums) == 0:
+            positions: Dict[str, List[int]] = {}
+            for i, c in enumerate(content):
+                positions.setdefault(c.lower(), []).append(i)  # type: ignore
+            self.positions = positions
+
+    @staticmethod
+    def _has_dynamic_weights(variants: List[str]) -> bool:
+        return any(
+            SLOT in v and re.search(NUM_WEIGHT_PATTERN, v) is not None for v in variants
+        )
+
+    def _draw_dynamic(self, numbers: List[str]) -> dict:
+        # same steps as NumMiddleware -> MultiplyMiddleware -> _split_content
+        content = _fill(self.content, numbers)  # type: ignore
+        data: dict = {"multi": False}
+        if "*" in content:
+            values, weights, is_multi = split_weights(content.split(self.slicer))
+            if is_multi:
+                content = self.slicer.join(values)
+                data.update(
+                    multi=True,
+                    weights=weights,
+                    cum_weights=list(itertools.accumulate(weights)),
+                )
+
+        if self.vars:
+            data["content"] = [c.strip() for c in content.split(self.slicer)]
+        else:
+            data["content"] = content
+        return data
+
+    def draw(self) -> dict:
+        """Data for Block.construct with NUM() filled in"""
+        numbers = [draw_number(nums) for nums in self.nums]
+
+        data = {
+            "vars": self.vars,
+            "before": self.before,
+            "slicer": self.slicer,
+            "cap": self.cap,
+            "after": self.after,
+            "end": self.end,
+        }
+
+        if self.dynamic:
+            data.update(self._draw_dynamic(numbers))
+            return data
+
+        if not self.vars:
+            data["content"] = _fill(self.content, numbers)  # type: ignore
+        elif len(numbers) == 0:
+            # generators never mutate content in place, it's safe to share
+            data["content"] = self.content
+            if self.positions is not None:
+                data["positions"] = self.positions
+        else:
+            data["content"] = [_fill(v, numbers) for v in self.content]  # type: ignore
+
+        data["multi"] = self.multi
+        if self.multi:
+            data["weights"] = self.weights
+            data["cum_weights"] = self.cum_weights
+
+        return data
+
+
+class CompiledExceptions:
+    """
+    Exceptions in the form generators read them.
+    Shared between draws, so it's never mutated after __init__,
+    what a draw has used up is kept in its own scratch buffer.
+    """
+
+    def __init__(self, exceptions: List[List[int]]) -> None:
+        # block number -> rest of every exception it's in
+        self.targets: Dict[int, Tuple[int, ...]] = {}
+        # exception -> its distinct blocks as (block, slot, count)
+        self.members: List[Tuple[Tuple[int, int, int], ...]] = []
+        # block number -> (exception, slot, count) for every exception it's in
+        self.slots: Dict[int, List[Tuple[int, int, int]]] = {}
+        self.size = 0
+
+        targets: Dict[int, List[int]] = {}
+        for k, exception in enumerate(exceptions):
+            members = []
+            for block, count in Counter(exception).items():
+                members.append((block, self.size, count))
+                self.slots.setdefault(block, []).append((k, self.size, count))
+                self.size += 1
+
+                rest = list(exception)
+                rest.remove(block)
+                targets.setdefault(block, []).extend(rest)
+            self.members.append(tuple(members))
+
+        self.targets = {block: tuple(rest) for block, rest in targets.items()}
+
+    def scratch(self) -> List[int]:
+        """Per draw: how many times each slot's block was used up"""
+        return [0] * self.size
+
+    def consume(self, used: List[int], s: int) -> Iterator[int]:
+        """
+        Uses up block s in every exception that still has it
+        and yields what's left of those exceptions,
+        same as exception.remove(s) and iterating over the rest.
+        """
+        for k, slot, count in self.slots.get(s, ()):
+            if used[slot] >= count:
+                continue
+
+            used[slot] += 1
+            for block, b_slot, b_count in self.members[k]:
+                if used[b_slot] < b_count:
+                    yield block
+
+
+class Plan:
+    """
+    Compiled body of a generator.
+    Built once per (id, hash) and then only drawn from.
+    """
+
+    def __init__(self, body: Body) -> None:
+        indexed = {e for exception in body.exceptions for e in exception}
+        self.blocks = [
+            CompiledBlock(block, i in indexed) for i, block in enumerate(body.blocks, 1)
+        ]
+        self.sequences = body.sequences
+        self.exceptions = body.exceptions
+        self.compiled_exceptions = CompiledExceptions(body.exceptions)
+
+    def is_compiled_from(self, data: dict) -> bool:
+        """
+        NOTE: hash covers blocks only.
+        """
+        return self.sequences == data.get("sequences", []) and (
+            self.exceptions == data.get("exceptions", [])
+        )
+
+    def body(self) -> Body:
+        """Fresh body for a single generation"""
+        return Body.construct(
+            blocks=[block.draw() for block in self.blocks],
+            sequences=self.sequences,
+            # generators only read it, see CompiledExceptions
+            exceptions=self.exceptions,
+        )
@@ -1,6 +1,6 @@
 import asyncio
 import html
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi_auth import User
 from pydantic import ValidationError
@@ -8,12 +8,14 @@ from pydantic import ValidationError
 from app.core.abc import AbstractEngine
 from app.core.blocks.body import Body
 from app.core.blocks.generator import Generator as BlocksGenerator
+from app.core.blocks.plan import Plan
 from app.core.errors import HeadValidationError
 from app.core.head import Head
 from app.core.metadata import Metadata
 from app.core.models import Action, Owner
 from app.core.response import (
     ErrorResponse,
+    GenerateManyResponse,
     GenerateResponse,
     Response,
     SaveResponse,
@@ -23,13 +25,23 @@ from app.entities.gens import GeneratorEntity
 from app.logger import Logger
 from app.repo.gens import GensRepo
 from app.repo.lists import ListsRepo
+from app.utils.lru import LRUCache
+
+PLAN_CACHE_SIZE = 512
+# LIST() content can be changed without touching the generator
+PLAN_CACHE_TTL = 60
+
+_plans: LRUCache[Plan] = LRUCache(PLAN_CACHE_SIZE, PLAN_CACHE_TTL)
 
 
 class HornetEngine(AbstractEngine):
     """
     generate:
-        - preprocess body (num, list, multiply)
+        - get compiled plan (list, num, multiply) from cache or compile it
+        - draw from plan
         - update views
+    generate_many:
+        - same as generate, but draws n results from one plan
     test:
         - preprocess body
         - test and backup or error
@@ -122,19 +134,52 @@ class HornetEngine(AbstractEngine):
     async def _postprocess(self, **kwargs) -> None:
         await self._process(self._generator.postprocess_save_middlewares, **kwargs)
 
+    def _plan_key(self) -> Optional[Tuple[int, str]]:
+        if self.entity is None or not self.entity.hash:
+            return None
+
+        return self.entity.id, self.entity.hash
+
+    async def _compile(self, **kwargs) -> Plan:
+        self._construct_body()
+        await self._process(self._generator.compile_middlewares, **kwargs)
+        return self._generator.compile(self.body)
+
+    async def _get_plan(self, **kwargs) -> Plan:
+        key = self._plan_key()
+        if key is None:
+            return await self._compile(**kwargs)
+
+        plan = _plans.get(key)
+        if plan is None or not plan.is_compiled_from(self.body_raw):  # type: ignore
+            plan = await self._compile(**kwargs)
+            _plans.set(key, plan)
+
+        return plan
+
     async def generate(self, **kwargs) -> GenerateResponse:
         self.action = Action.GENERATE
-        self._construct_body()
 
-        await self._preprocess(**kwargs)
+        plan = await self._get_plan(**kwargs)
 
-        result = self._generator.generate(self.body)
+        result = self._generator.generate(plan)
         escaped_result = html.escape(result)
 
         response = Response()
         response.result = escaped_result
         return response.generate()
 
+    async def generate_many(self, n: int, **kwargs) -> GenerateManyResponse:
+        self.action = Action.GENERATE
+
+        plan = await self._get_plan(**kwargs)
+
+        results = [html.escape(self._generator.generate(plan)) for _ in range(n)]
+
+        response = Response()
+        response.results = results
+        return response.generate_many()
+
     async def test(self, **kwargs) -> TestResponse | ErrorResponse:
         self.action = Action.TEST
 
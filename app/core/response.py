@@ -1,5 +1,5 @@
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -44,11 +44,16 @@ class GenerateResponse(BaseModel):
     msg: str
 
 
+class GenerateManyResponse(BaseModel):
+    msg: List[str]
+
+
 class Response:
     head_message: Optional[dict]
     format_message: Optional[dict]
     body_message: Optional[dict]
     result: Optional[str]
+    results: Optional[List[str]]
     id: Optional[int]
 
     def __init__(self) -> None:
@@ -56,6 +61,7 @@ class Response:
         self.format_message = None
         self.body_message = None
         self.result = None
+        self.results = None
 
     def save(self) -> SaveResponse:
         assert self.id is not None
@@ -79,6 +85,10 @@ class Response:
         assert self.result is not None
         return GenerateResponse(msg=self.result)
 
+    def generate_many(self) -> GenerateManyResponse:
+        assert self.results is not None
+        return GenerateManyResponse(msg=self.results)
+
     def has_error(self) -> bool:
         return (
             self.head_message is not None
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional
+
+from asyncpg import Connection, Pool
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundQueue:
+    """
+    App-wide queue for fire-and-forget writes (cache sets, counters),
+    run by a fixed number of workers after the request is done,
+    so they don't hold up the response or the request's connections.
+
+    Redis jobs are coroutines on the pool client (connection per command),
+    db jobs get a pool connection of their own, see submit_db.
+
+    Backpressure: submit returns False if the queue is not running or full,
+    callers then run the job themselves (see RedisCache.background).
+    """
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._db_pool: Optional[Pool] = None
+        self._running = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._overflow = 0
+
+    @property
+    def started(self) -> bool:
+        return self._queue is not None
+
+    def start(self, db_pool: Pool, workers: int, maxsize: int) -> None:
+        self._db_pool = db_pool
+        self._queue = asyncio.Queue(maxsize)
+        self._workers = [asyncio.create_task(self._work()) for _ in range(workers)]
+
+    async def stop(self) -> None:
+        """
+        Runs what's left in the queue, then stops the workers
+        """
+        if self._queue is None:
+            return
+
+        queue, self._queue = self._queue, None
+        await queue.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, coro: Coroutine[Any, Any, Any]) -> bool:
+        if self._queue is None:
+            return False
+
+        try:
+            self._queue.put_nowait(coro)
+        except asyncio.QueueFull:
+            self._overflow += 1
+            return False
+
+        self._submitted += 1
+        return True
+
+    def submit_db(self, job: Callable[[Connection], Awaitable[Any]]) -> bool:
+        if self._db_pool is None:
+            return False
+
+        coro = self._with_connection(self._db_pool, job)
+        if self.submit(coro):
+            return True
+
+        coro.close()
+        return False
+
+    @staticmethod
+    async def _with_connection(
+        pool: Pool,
+        job: Callable[[Connection], Awaitable[Any]],
+    ) -> None:
+        async with pool.acquire() as conn:
+            await job(conn)
+
+    async def _work(self) -> None:
+        queue = self._queue
+        assert queue is not None
+        while True:
+            coro = await queue.get()
+            self._running += 1
+            try:
+                await coro
+                self._completed += 1
+            except Exception:
+                self._failed += 1
+                logger.exception("background job %s failed", coro)
+            finally:
+                self._running -= 1
+                queue.task_done()
+
+    def metrics(self) -> Dict[str, int]:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self._running,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "overflow": self._overflow,
+        }
+
+
+background_queue = BackgroundQueue()
@@ -0,0 +1,199 @@
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Set, TypeVar
+
+import orjson
+
+from app.db.postgres import PostgresDB
+from app.db.redis import RedisCache
+from app.utils.strings import create_random_string
+
+T = TypeVar("T")
+
+# KEYS: lock
+# ARGV: token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+  return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class _Options(NamedTuple):
+    lock_ttl: int
+    wait_timeout: float
+    replaced: Optional[Callable[[Any], Awaitable[None]]]
+
+
+# per worker, computes in progress by key
+_inflight: Dict[str, asyncio.Future] = {}
+# per worker, keys with a background refresh queued or running
+_refreshing: Set[str] = set()
+
+
+class DerivedCache:
+    """
+    Get-or-compute for values derived from heavy queries
+    (categories, tags, preview), safe against stampedes:
+
+    - stale-while-revalidate: {key} keeps the value for ttl + stale seconds,
+      {key}:fresh marks it fresh for ttl. A stale value is served while
+      one background refresh recomputes it. reset drops the mark only.
+    - single-flight: one compute per key per worker (shared future),
+      one across workers ({key}:lock), the others wait for its value.
+    - jittered ttl, so keys set together don't expire together.
+
+    Defaults suit computes of a second or less, pass lock_ttl and
+    wait_timeout sized to the compute for slower ones (sitemap).
+    """
+
+    lock_ttl: int = 10
+    wait_step: float = 0.05
+    # waiters poll less often the longer they wait
+    wait_step_max: float = 1.0
+    # then compute without the lock
+    wait_timeout: float = 2.0
+    jitter: float = 0.1
+
+    def __init__(self, db: PostgresDB, cache: RedisCache) -> None:
+        self._db = db
+        self._cache = cache
+
+    async def get(
+        self,
+        key: str,
+        compute: Callable[[PostgresDB], Awaitable[T]],
+        ttl: int,
+        stale: int,
+        lock_ttl: Optional[int] = None,
+        wait_timeout: Optional[float] = None,
+        replaced: Optional[Callable[[Any], Awaitable[None]]] = None,
+    ) -> T:
+        """
+        lock_ttl, wait_timeout - class defaults if None
+        replaced - called with the previous value once a new one is stored
+        """
+        opts = _Options(
+            lock_ttl if lock_ttl is not None else self.lock_ttl,
+            wait_timeout if wait_timeout is not None else self.wait_timeout,
+            replaced,
+        )
+        pipe = self._cache.pipeline()
+        pipe.get(key)
+        pipe.exists(f"{key}:fresh")
+        c_value, fresh = await pipe.execute()
+
+        if c_value is not None:
+            if not fresh:
+                self._refresh_in_background(key, compute, ttl, stale, opts)
+            return orjson.loads(c_value)
+
+        return await self._compute_once(key, compute, ttl, stale, opts, self._db)
+
+    async def reset(self, key: str) -> None:
+        await self._cache.delete(f"{key}:fresh")
+
+    def reset_in_background(self, key: str) -> None:
+        self._cache.background(self._cache.delete(f"{key}:fresh"))
+
+    def _refresh_in_background(
+        self,
+        key: str,
+        compute: Callable[[PostgresDB], Awaitable[T]],
+        ttl: int,
+        stale: int,
+        opts: _Options,
+    ) -> None:
+        if key in _refreshing or key in _inflight:
+            return
+
+        _refreshing.add(key)
+
+        async def _refresh(db: PostgresDB) -> None:
+            try:
+                await self._compute_once(key, compute, ttl, stale, opts, db, wait=False)
+            finally:
+                _refreshing.discard(key)
+
+        self._db.background(_refresh)
+
+    async def _compute_once(
+        self,
+        key: str,
+        compute: Callable[[PostgresDB], Awaitable[T]],
+        ttl: int,
+        stale: int,
+        opts: _Options,
+        db: PostgresDB,
+        wait: bool = True,
+    ) -> Any:
+        fut = _inflight.get(key)
+        if fut is not None:
+            value = await asyncio.shield(fut)
+            if value is not None or not wait:
+                return value
+            # joined a refresh that another worker was already doing
+            return await self._compute_locked(key, compute, ttl, stale, opts, db, wait)
+
+        fut = asyncio.get_running_loop().create_future()
+        _inflight[key] = fut
+        try:
+            value = await self._compute_locked(key, compute, ttl, stale, opts, db, wait)
+            fut.set_result(value)
+            return value
+        except Exception as e:
+            fut.set_exception(e)
+            # mark as retrieved, there may be no one waiting
+            fut.exception()
+            raise
+        finally:
+            if not fut.done():
+                fut.cancel()
+            del _inflight[key]
+
+    async def _compute_locked(
+        self,
+        key: str,
+        compute: Callable[[PostgresDB], Awaitable[T]],
+        ttl: int,
+        stale: int,
+        opts: _Options,
+        db: PostgresDB,
+        wait: bool,
+    ) -> Optional[T]:
+        """
+        wait=False (refresh): returns None if another worker holds the lock
+        """
+        lock_key = f"{key}:lock"
+        token = create_random_string(16)
+        if not await self._cache.setnx(lock_key, token, opts.lock_ttl):
+            if not wait:
+                return None
+
+            deadline = time.monotonic() + opts.wait_timeout
+            step = self.wait_step
+            while time.monotonic() < deadline:
+                await asyncio.sleep(step)
+                step = min(step * 2, self.wait_step_max)
+                c_value = await self._cache.get(key)
+                if c_value is not None:
+                    return orjson.loads(c_value)
+
+            return await compute(db)
+
+        try:
+            value = await compute(db)
+            ex = int(ttl * (1 + random.uniform(0, self.jitter)))
+            pipe = self._cache.pipeline()
+            pipe.get(key)
+            pipe.set(key, orjson.dumps(value), ex=ex + stale)
+            pipe.set(f"{key}:fresh", 1, ex=ex)
+            prev, _, _ = await pipe.execute()
+        finally:
+            await self._cache.eval_script(RELEASE_LOCK_SCRIPT, [lock_key], [token])
+
+        if prev is not None and opts.replaced is not None:
+            await opts.replaced(orjson.loads(prev))
+        return value
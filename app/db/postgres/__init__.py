@@ -1,8 +1,8 @@
-import asyncio
-from typing import List
+from typing import Any, Callable, Coroutine, List
 
 from asyncpg import Connection
 
+from app.db.background import background_queue
 from app.db.postgres.events import EventsExt
 from app.db.postgres.general import GeneralExt
 from app.db.postgres.gens import GensExt
@@ -15,7 +15,8 @@ from app.db.postgres.settings import SettingsExt
 class PostgresDB:
     def __init__(self, conn: Connection) -> None:
         self._conn = conn
-        self.background_tasks: List[asyncio.Task] = []
+        # jobs background couldn't queue, see run_deferred
+        self._deferred: List[Callable[["PostgresDB"], Coroutine[Any, Any, None]]] = []
 
         self.gens = GensExt(conn)
         self.lists = ListsExt(conn)
@@ -25,6 +26,30 @@ class PostgresDB:
         self.internal = InternalExt(conn)
         self.events = EventsExt(conn)
 
-    def background(self, fut) -> None:
-        task = asyncio.create_task(fut)
-        self.background_tasks.append(task)
+    def background(
+        self, job: Callable[["PostgresDB"], Coroutine[Any, Any, None]]
+    ) -> None:
+        """
+        Runs job after the request, on the app background queue
+        with a pool connection of its own. If the queue is full
+        (or not started), it's deferred: run_deferred runs it on this
+        connection after the handler and the request waits for it.
+        """
+
+        async def _job(conn: Connection) -> None:
+            await job(PostgresDB(conn))
+
+        if background_queue.submit_db(_job):
+            return
+
+        # not started now: the request's connection runs one query at a time
+        self._deferred.append(job)
+
+    async def run_deferred(self) -> None:
+        """
+        Deferred background jobs, one at a time on this connection.
+        Called by get_repo once the handler is done.
+        """
+        while len(self._deferred) > 0:
+            job = self._deferred.pop(0)
+            await job(self)
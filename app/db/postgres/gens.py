@@ -1,3 +1,4 @@
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import List, Optional, Tuple
@@ -9,7 +10,9 @@ from sqlsl import Queries
 from app.core.head import Head
 from app.core.metadata import Metadata
 from app.db.postgres.common import fix_user_field, was_updated
+from app.entities.gens import GeneratorSearchRow
 from app.models.gens import SearchParams, SearchSort
+from app.utils.cursor import decode_cursor
 from app.utils.strings import create_random_string
 
 
@@ -29,11 +32,20 @@ class GensQ(Queries):
     get_tags: str
     get_suggestions: str
 
+    get_counts_state: str
+    add_category_counts: str
+    add_subcategory_counts: str
+    add_tag_counts: str
+    reconcile_counts: str
+
     get_likes_count: str
     get_favs_count: str
-    increment_views: str
+    get_liked_and_faved: str
+    add_views: str
 
+    refresh_search: str
     search: str
+    search_after: str
     search_count: str
     get_stats: str
 
@@ -41,6 +53,10 @@ class GensQ(Queries):
 path = Path(__file__).parent / "sql" / "gen.sql"
 q = GensQ().from_file(path)
 
+# search sort key for nullable dates, NULL last under DESC,
+# see migrations/05_gen_search_keyset_nulls.sql
+NULL_DATE_SORT = "COALESCE({}, '-infinity'::timestamptz)"
+
 MAX_VH_SIZE = 5
 
 
@@ -211,6 +227,8 @@ class GensExt:
                 category_id,
                 head.subcategories,  # type: ignore
             )
+            await self.refresh_search(gen_id)
+            await self._update_counts(None, await self._get_counts_state(gen_id))
 
             await self.create_vh(
                 gen_id,
@@ -237,6 +255,8 @@ class GensExt:
         metadata: Metadata,
     ) -> bool:
         async with self._conn.transaction():
+            # locks the row, concurrent updates wait to read their prev state
+            prev_counts_state = await self._get_counts_state(id)
             prev = await self.get(id)
             assert prev is not None
 
@@ -280,6 +300,11 @@ class GensExt:
                 category_id,
                 head.subcategories,  # type: ignore
             )
+            await self.refresh_search(id)
+            await self._update_counts(
+                prev_counts_state,
+                await self._get_counts_state(id),
+            )
 
             if has_update:
                 count: int = await self._conn.fetchval(
@@ -474,16 +499,20 @@ class GensExt:
         )
 
     async def activate(self, id: int) -> bool:
-        res = await self._conn.execute(
-            "UPDATE gen SET active = True WHERE id = $1;", id
-        )
-        return was_updated(res)
+        async with self._conn.transaction():
+            res = await self._conn.execute(
+                "UPDATE gen SET active = True WHERE id = $1;", id
+            )
+            await self.refresh_search(id)
+            return was_updated(res)
 
     async def deactivate(self, id: int) -> bool:
-        res = await self._conn.execute(
-            "UPDATE gen SET active = False WHERE id = $1;", id
-        )
-        return was_updated(res)
+        async with self._conn.transaction():
+            res = await self._conn.execute(
+                "UPDATE gen SET active = False WHERE id = $1;", id
+            )
+            await self.refresh_search(id)
+            return was_updated(res)
 
     # VIEW
 
@@ -514,6 +543,63 @@ class GensExt:
         )
         return res
 
+    async def _get_counts_state(self, id: int) -> Optional[dict]:
+        """category_id, access, subcategory_ids, tag_ids of a gen"""
+        row = await self._conn.fetchrow(q.get_counts_state, id)
+        if row is None:
+            return None
+
+        return dict(row)
+
+    async def _update_counts(
+        self,
+        prev: Optional[dict],
+        curr: Optional[dict],
+    ) -> None:
+        """
+        Applies the change of a gen (two _get_counts_state) to category,
+        subcategory and tag counts, call in the same transaction.
+        Counts mean the same as before they were stored:
+        category - all gens, subcategory - gens not in "other" (99),
+        tag - public gens.
+        """
+        categories: Counter = Counter()
+        subcategories: Counter = Counter()
+        tags: Counter = Counter()
+        for state, sign in ((prev, -1), (curr, 1)):
+            if state is None:
+                continue
+
+            category_id = state.get("category_id")
+            if category_id is not None:
+                categories[category_id] += sign
+                if category_id != 99:
+                    for s_id in state.get("subcategory_ids"):  # type: ignore
+                        subcategories[s_id] += sign
+
+            if state.get("access") == 0:
+                for t_id in state.get("tag_ids"):  # type: ignore
+                    tags[t_id] += sign
+
+        for query, counter in (
+            (q.add_category_counts, categories),
+            (q.add_subcategory_counts, subcategories),
+            (q.add_tag_counts, tags),
+        ):
+            # by id, so concurrent saves lock the shared rows in the same
+            # order instead of deadlocking on each other
+            deltas = sorted((id, delta) for id, delta in counter.items() if delta != 0)
+            if len(deltas) > 0:
+                await self._conn.execute(
+                    query,
+                    [id for id, _ in deltas],
+                    [delta for _, delta in deltas],
+                )
+
+    async def reconcile_counts(self) -> int:
+        """Recounts from scratch, returns how many counts were off"""
+        return await self._conn.fetchval(q.reconcile_counts)  # type: ignore
+
     async def get_tags(self) -> List[dict]:
         tags = await self._conn.fetch(q.get_tags)
         return [
@@ -549,6 +635,10 @@ class GensExt:
                     id,
                     user_id,
                 )
+                await self._conn.execute(
+                    "UPDATE gen_search SET likes_count = likes_count + 1 WHERE gen_id = $1;",
+                    id,
+                )
                 return True
             else:
                 await self._conn.execute(
@@ -556,6 +646,10 @@ class GensExt:
                     id,
                     user_id,
                 )
+                await self._conn.execute(
+                    "UPDATE gen_search SET likes_count = likes_count - 1 WHERE gen_id = $1;",
+                    id,
+                )
                 return False
 
     async def toggle_fav(self, id: int, user_id: int) -> bool:
@@ -573,6 +667,10 @@ class GensExt:
                     id,
                     user_id,
                 )
+                await self._conn.execute(
+                    "UPDATE gen_search SET favs_count = favs_count + 1 WHERE gen_id = $1;",
+                    id,
+                )
                 return True
             else:
                 await self._conn.execute(
@@ -580,30 +678,54 @@ class GensExt:
                     id,
                     user_id,
                 )
+                await self._conn.execute(
+                    "UPDATE gen_search SET favs_count = favs_count - 1 WHERE gen_id = $1;",
+                    id,
+                )
                 return False
 
-    async def increment_views(self, id: int) -> None:
-        await self._conn.execute(q.increment_views, id)
+    async def get_liked_and_faved(self, id: int, user_id: int) -> Tuple[bool, bool]:
+        row = await self._conn.fetchrow(q.get_liked_and_faved, id, user_id)
+        return row.get("liked"), row.get("faved")
+
+    async def add_views(self, ids: List[int], deltas: List[int]) -> None:
+        """Single UPDATE for a batch of buffered view increments"""
+        await self._conn.execute(q.add_views, ids, deltas)
 
     # SEARCH
 
+    async def refresh_search(self, id: int) -> None:
+        """Rebuilds gen_search row, call in the same transaction as the change"""
+        await self._conn.execute(q.refresh_search, id)
+
     async def search(
         self,
         p: SearchParams,
         page_size: int,
         is_admin: bool,
-    ) -> Tuple[List[dict], int]:
+    ) -> Tuple[List[GeneratorSearchRow], Optional[int]]:
+        """
+        Rows are GeneratorSearchRow, without body.
+        Count is None for keyset pages (p.after).
+        Raises ValueError if p.after is malformed.
+        """
         match p.sort:
             case SearchSort.DATE_UPDATED:
-                sort_by = "g.date_updated"
+                sort_by = NULL_DATE_SORT.format("gs.date_updated")
+                sort_type = "timestamptz"
             case SearchSort.LIKES:
-                sort_by = "likes_count"
+                sort_by = "gs.likes_count"
+                sort_type = "int"
             case SearchSort.VIEWS:
+                # rewritten by every views flush, offset pages only
                 sort_by = "g.views"
+                sort_type = None
             case SearchSort.DATE_ADDED:
-                sort_by = "g.date_added"
+                sort_by = NULL_DATE_SORT.format("gs.date_added")
+                sort_type = "timestamptz"
             case _:
-                sort_by = "g.date_added"
+                sort_by = NULL_DATE_SORT.format("gs.date_added")
+                sort_type = "timestamptz"
         sort_order = "DESC"
         if is_admin:
             access = None
@@ -611,6 +733,41 @@ class GensExt:
         else:
             access = 0
             active = True
+
+        if p.after is not None:
+            if sort_type is None:
+                raise ValueError("invalid cursor")
+
+            key, after_id = decode_cursor(p.after)
+            if sort_type == "timestamptz":
+                # None for a NULL date, compared as -infinity
+                if key is not None:
+                    if not isinstance(key, str):
+                        raise ValueError("invalid cursor")
+                    key = datetime.fromisoformat(key)
+            elif not isinstance(key, int):
+                raise ValueError("invalid cursor")
+
+            key_param = f"$8::{sort_type}"
+            if sort_type == "timestamptz":
+                key_param = NULL_DATE_SORT.format(key_param)
+            query = q.search_after.format(sort_by, sort_order, key_param)
+            items = fix_user_field(
+                await self._conn.fetch(
+                    query,
+                    page_size,
+                    p.title,
+                    p.category,
+                    p.subcategories,
+                    p.tags,
+                    access,
+                    active,
+                    key,
+                    after_id,
+                )
+            )
+            return items, None  # type: ignore
+
         query = q.search.format(sort_by, sort_order)
         offset = page_size * (p.p - 1)
         items = fix_user_field(
@@ -626,15 +783,24 @@ class GensExt:
                 active,
             )
         )
-        count = await self._conn.fetchval(
-            q.search_count,
-            p.title,
-            p.category,
-            p.subcategories,
-            p.tags,
-            access,
-            active,
-        )
+
+        # total comes with the page, unless the page is past the end
+        if len(items) > 0:
+            count = items[0].get("total")
+            for item in items:
+                del item["total"]
+        elif offset == 0:
+            count = 0
+        else:
+            count = await self._conn.fetchval(
+                q.search_count,
+                p.title,
+                p.category,
+                p.subcategories,
+                p.tags,
+                access,
+                active,
+            )
         return items, count  # type: ignore
 
     # ADMIN
@@ -662,8 +828,36 @@ class GensExt:
                 t_id,
                 new,
             )
+            await self._conn.execute(
+                "UPDATE gen_search SET tags = array_replace(tags, $1, $2) WHERE tags @> ARRAY[$1::text];",
+                old,
+                new,
+            )
             return True
 
+    async def get_ids_by_tag(self, name: str) -> List[int]:
+        rows = await self._conn.fetch(
+            "SELECT gt.gen_id FROM gen_tag gt JOIN tag t ON t.id = gt.tag_id WHERE t.name = $1;",
+            name,
+        )
+        return [row.get("gen_id") for row in rows]
+
+    async def get_ids_by_subcategory(self, c: str, sc: str) -> List[int]:
+        rows = await self._conn.fetch(
+            """
+            SELECT gs.gen_id
+            FROM gen_subcategory gs
+            JOIN subcategory s
+              ON s.id = gs.subcategory_id
+            JOIN category c
+              ON c.id = s.category_id
+            WHERE c.name = $1 AND s.name = $2;
+            """,
+            c,
+            sc,
+        )
+        return [row.get("gen_id") for row in rows]
+
     async def rename_subcategory(self, c: str, old_sc: str, new_sc: str) -> bool:
         async with self._conn.transaction():
             c_id = await self.get_category_by_name(c)
@@ -683,4 +877,10 @@ class GensExt:
                 old_sc,
                 new_sc,
             )
+            await self._conn.execute(
+                "UPDATE gen_search SET subcategories = array_replace(subcategories, $2, $3) WHERE category = $1 AND subcategories @> ARRAY[$2::text];",
+                c,
+                old_sc,
+                new_sc,
+            )
             return True
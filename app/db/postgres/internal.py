@@ -1,13 +1,22 @@
-from typing import List
+from typing import AsyncIterator
 
 from asyncpg import Connection
 
+from app.entities.gens import GeneratorSitemapRow
+
 
 class InternalExt:
     def __init__(self, conn: Connection) -> None:
         self._conn = conn
 
-    async def get_sitemap(self) -> List[dict]:
-        return await self._conn.fetch(
-            "SELECT id, date_updated FROM gen WHERE access = 0 AND active = true ORDER BY id ASC;"
-        )
+    async def iter_sitemap(
+        self,
+        prefetch: int = 1000,
+    ) -> AsyncIterator[GeneratorSitemapRow]:
+        """Server side cursor, prefetch rows per round trip"""
+        async with self._conn.transaction():
+            async for row in self._conn.cursor(
+                "SELECT id, date_updated FROM gen WHERE access = 0 AND active = true ORDER BY id ASC;",
+                prefetch=prefetch,
+            ):
+                yield row  # type: ignore
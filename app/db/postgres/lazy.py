@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any, AsyncIterator, Optional
+
+from asyncpg import Connection, Pool
+from asyncpg.transaction import Transaction
+
+
+class _LazyTransaction:
+    def __init__(self, lazy: "LazyConnection", **kwargs) -> None:
+        self._lazy = lazy
+        self._kwargs = kwargs
+        self._tr: Optional[Transaction] = None
+
+    async def __aenter__(self) -> Transaction:
+        conn = await self._lazy.acquire()
+        self._tr = conn.transaction(**self._kwargs)
+        return await self._tr.__aenter__()
+
+    async def __aexit__(self, *exc) -> None:
+        assert self._tr is not None
+        await self._tr.__aexit__(*exc)
+
+
+class LazyConnection:
+    """
+    Request scoped stand-in for asyncpg Connection, shared by all repos
+    of a request. Checks out a pool connection on the first query only,
+    so requests served from cache never touch the pool.
+
+    NOTE: like a plain Connection, it runs one query at a time.
+    """
+
+    def __init__(self, pool: Pool) -> None:
+        self._pool = pool
+        self._conn: Optional[Connection] = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> Connection:
+        if self._conn is None:
+            async with self._lock:
+                if self._conn is None:
+                    self._conn = await self._pool.acquire()  # type: ignore
+        return self._conn  # type: ignore
+
+    async def release(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await self._pool.release(conn)
+
+    async def execute(self, *args, **kwargs) -> str:
+        return await (await self.acquire()).execute(*args, **kwargs)
+
+    async def executemany(self, *args, **kwargs) -> None:
+        return await (await self.acquire()).executemany(*args, **kwargs)
+
+    async def fetch(self, *args, **kwargs) -> list:
+        return await (await self.acquire()).fetch(*args, **kwargs)
+
+    async def fetchrow(self, *args, **kwargs) -> Any:
+        return await (await self.acquire()).fetchrow(*args, **kwargs)
+
+    async def fetchval(self, *args, **kwargs) -> Any:
+        return await (await self.acquire()).fetchval(*args, **kwargs)
+
+    def cursor(self, *args, **kwargs) -> AsyncIterator:
+        """Only async for is supported, call in a transaction"""
+        return self._iter_cursor(*args, **kwargs)
+
+    async def _iter_cursor(self, *args, **kwargs) -> AsyncIterator:
+        async for row in (await self.acquire()).cursor(*args, **kwargs):
+            yield row
+
+    def transaction(self, **kwargs) -> _LazyTransaction:
+        return _LazyTransaction(self, **kwargs)
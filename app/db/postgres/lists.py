@@ -8,15 +8,18 @@ from sqlsl import Queries
 
 from app.db.postgres.common import fix_user_field, was_updated
 from app.models.lists import SearchParams
+from app.utils.cursor import decode_cursor
 
 
 class ListsQ(Queries):
     get: str
+    get_many: str
     create: str
     update: str
     get_stats: str
 
     search: str
+    search_after: str
     search_count: str
 
 
@@ -41,6 +44,20 @@ class ListsExt:
 
         return None
 
+    async def get_many(self, ids: List[int]) -> List[dict]:
+        """Existing lists only, in any order"""
+        rows = await self._conn.fetch(q.get_many, ids)
+        return [
+            dict(
+                **row,
+                user={
+                    "id": row.get("user_id"),
+                    "username": row.get("username"),
+                }
+            )
+            for row in rows
+        ]
+
     async def create(self, editor: User, data: dict) -> int:
         async with self._conn.transaction():
             now = datetime.now(tz=timezone.utc)
@@ -99,13 +116,32 @@ class ListsExt:
         p: SearchParams,
         page_size: int,
         is_admin: bool,
-    ) -> Tuple[List[dict], int]:
+    ) -> Tuple[List[dict], Optional[int]]:
+        """
+        Count is None for keyset pages (p.after).
+        Raises ValueError if p.after is malformed.
+        """
         sort_by = "l.id"
         sort_order = "DESC"
         if is_admin:
             access = None
         else:
             access = 0
+
+        if p.after is not None:
+            _, after_id = decode_cursor(p.after)
+            query = q.search_after.format(sort_by, sort_order)
+            items = fix_user_field(
+                await self._conn.fetch(
+                    query,
+                    page_size,
+                    p.title,
+                    access,
+                    after_id,
+                )
+            )
+            return items, None
+
         query = q.search.format(sort_by, sort_order)
         offset = page_size * (p.p - 1)
         items = fix_user_field(
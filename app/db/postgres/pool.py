@@ -0,0 +1,37 @@
+import orjson
+from asyncpg import Connection, Pool, create_pool
+
+from app.config import (
+    DATABASE_MAX_INACTIVE_CONNECTION_LIFETIME,
+    DATABASE_POOL_MAX_SIZE,
+    DATABASE_POOL_MIN_SIZE,
+    DATABASE_STATEMENT_CACHE_SIZE,
+)
+
+
+def _encode_json(value) -> str:
+    # json.dumps turned non-str keys into strings, keep that
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+async def init_connection(conn: Connection) -> None:
+    """
+    Runs once per new pool connection, not on every acquire.
+    """
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=_encode_json,
+        decoder=orjson.loads,
+        schema="pg_catalog",
+    )
+
+
+async def open_pool(dsn: str) -> Pool:
+    return await create_pool(  # type: ignore
+        dsn,
+        min_size=DATABASE_POOL_MIN_SIZE,
+        max_size=DATABASE_POOL_MAX_SIZE,
+        statement_cache_size=DATABASE_STATEMENT_CACHE_SIZE,
+        max_inactive_connection_lifetime=DATABASE_MAX_INACTIVE_CONNECTION_LIFETIME,
+        init=init_connection,
+    )
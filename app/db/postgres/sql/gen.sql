@@ -65,14 +65,6 @@ SELECT
     WHERE
       g.id = gt.gen_id
   ) AS tags,
-  (
-    SELECT
-      COALESCE(array_agg(user_id), ARRAY[]::int[])
-    FROM
-      gen_like
-    WHERE
-      gen_id = g.id
-  ) as likes,
   (
     SELECT
       count(*)
@@ -81,14 +73,6 @@ SELECT
     WHERE
       g.id = gen_id
   ) AS likes_count,
-  (
-    SELECT
-      COALESCE(array_agg(user_id), ARRAY[]::int[])
-    FROM
-      gen_fav
-    WHERE
-      gen_id = g.id
-  ) as favs,
   (
     SELECT
       count(*)
@@ -110,14 +94,28 @@ WHERE
 GROUP BY
   g.id;
 
--- name: increment_views
-UPDATE gen SET views = views + 1 WHERE id = $1;
+-- name: get_liked_and_faved
+SELECT
+  EXISTS(
+    SELECT 1 FROM gen_like WHERE gen_id = $1 AND user_id = $2
+  ) AS liked,
+  EXISTS(
+    SELECT 1 FROM gen_fav WHERE gen_id = $1 AND user_id = $2
+  ) AS faved;
+
+-- name: add_views
+UPDATE gen g SET
+  views = g.views + v.delta
+FROM
+  unnest($1::int[], $2::bigint[]) AS v(id, delta)
+WHERE
+  g.id = v.id;
 
 -- name: get_categories
 SELECT
   c.id,
   c.name,
-  (SELECT COUNT(1) FROM gen g WHERE g.category_id = c.id) AS count
+  c.gens_count AS count
 FROM
   category c
 WHERE
@@ -127,7 +125,7 @@ WHERE
 SELECT
 	c.id,
 	c.name,
-	(SELECT COUNT(1) FROM gen g WHERE g.category_id = 99) as count
+	c.gens_count AS count
 FROM
 	category c
 WHERE
@@ -137,31 +135,62 @@ WHERE
 SELECT
 	s.category_id,
 	s.name,
-	count(1) AS count
-FROM gen g
-JOIN gen_subcategory gs
-	ON gs.gen_id = g.id
-JOIN subcategory s
-	ON s.id = gs.subcategory_id
-JOIN category c
-	ON c.id = s.category_id
-WHERE g.category_id != 99
-GROUP BY s.id, c.name
+	s.gens_count AS count
+FROM subcategory s
+WHERE s.gens_count > 0
 ORDER BY s.category_id, s.name using ~<~;
 
 -- name: get_tags
 SELECT
 	t.name,
-	COUNT(1) AS count
-FROM gen g
-JOIN gen_tag gt
-	ON gt.gen_id = g.id
-JOIN tag t
-	ON t.id = gt.tag_id
-WHERE g.access = 0
-GROUP BY t.id
+	t.gens_count AS count
+FROM tag t
+WHERE t.gens_count > 0
 ORDER BY t.name USING ~<~;
 
+-- name: get_counts_state
+SELECT
+  g.category_id,
+  g.access,
+  ARRAY(
+    SELECT gs.subcategory_id FROM gen_subcategory gs WHERE gs.gen_id = g.id
+  ) AS subcategory_ids,
+  ARRAY(
+    SELECT gt.tag_id FROM gen_tag gt WHERE gt.gen_id = g.id
+  ) AS tag_ids
+FROM
+  gen g
+WHERE
+  g.id = $1
+FOR UPDATE OF g;
+
+-- name: add_category_counts
+UPDATE category c SET
+  gens_count = c.gens_count + d.delta
+FROM
+  unnest($1::int[], $2::int[]) AS d(id, delta)
+WHERE
+  c.id = d.id;
+
+-- name: add_subcategory_counts
+UPDATE subcategory s SET
+  gens_count = s.gens_count + d.delta
+FROM
+  unnest($1::int[], $2::int[]) AS d(id, delta)
+WHERE
+  s.id = d.id;
+
+-- name: add_tag_counts
+UPDATE tag t SET
+  gens_count = t.gens_count + d.delta
+FROM
+  unnest($1::int[], $2::int[]) AS d(id, delta)
+WHERE
+  t.id = d.id;
+
+-- name: reconcile_counts
+SELECT gen_counts_reconcile();
+
 -- name: get_suggestions
 SELECT
   g.id,
@@ -394,192 +423,106 @@ UPDATE gen SET
 WHERE
   id = $1;
 
+-- name: refresh_search
+SELECT gen_search_refresh($1);
+
 -- name: search_count
 SELECT
   COUNT(1)
-FROM gen g
+FROM gen_search gs
 WHERE
-  ($1::text IS NULL OR g.title iLIKE CONCAT('%', $1::text, '%'))
-  AND ($2::text IS NULL OR $2::text = (
-    SELECT
-      c.name
-    FROM
-      category c
-    WHERE
-      c.id = g.category_id
-  ))
-  AND ($3::text[] IS NULL OR $3::text[] && (
-    SELECT
-      array_remove(array_agg(s.name), NULL)
-    FROM
-      gen_subcategory gs
-    JOIN subcategory s
-      ON s.id = gs.subcategory_id
-    WHERE
-      g.id = gs.gen_id
-  ))
-  AND ($4::text[] IS NULL OR $4::text[] && (
-    SELECT
-      array_agg(t.name)
-    FROM
-      gen_tag gt
-    JOIN tag t
-      ON t.id = gt.tag_id
-    WHERE
-      g.id = gt.gen_id
-  ))
-  AND ($5::int IS NULL OR g.access = $5::int)
-  AND ($6::boolean IS NULL OR g.active = $6::boolean)
+  ($1::text IS NULL OR gs.title iLIKE CONCAT('%', $1::text, '%'))
+  AND ($2::text IS NULL OR gs.category = $2::text)
+  AND ($3::text[] IS NULL OR gs.subcategories && $3::text[])
+  AND ($4::text[] IS NULL OR gs.tags && $4::text[])
+  AND ($5::int IS NULL OR gs.access = $5::int)
+  AND ($6::boolean IS NULL OR gs.active = $6::boolean)
 ;
 
 -- name: search
 SELECT
   g.id,
   g.user_id,
-  (
-    SELECT username FROM auth_user WHERE id = g.user_id
-  ),
+  au.username,
   g.title,
   g.description,
   g.access,
-  (
-    SELECT
-      c.name
-    FROM
-      category c
-    WHERE
-      c.id = g.category_id
-  ) AS category,
+  gs.category,
   g.views,
   g.date_added,
   g.date_updated,
 
-  g.access_key,
-  g.hash,
   g.variations,
   g.active,
   g.ads,
   g.copyright,
 
-  (
-    SELECT
-      eg.name
-    FROM
-      generator eg
-    WHERE
-      eg.id = g.generator_id
-  ) AS generator,
-  (
-	  SELECT
-	  	COALESCE(array_agg(DISTINCT egf.name), ARRAY[]::text[])
-	  FROM feature egf
-	  JOIN generator eg
-	  	ON eg.id = egf.generator_id
-	  JOIN gen_feature gegf
-	  	ON gegf.gen_id = g.id
-  ) AS features,
-
+  gs.generator,
   g.format,
-  g.body,
-  (
-    SELECT
-      array_remove(array_agg(s.name), NULL)
-    FROM
-      gen_subcategory gs
-    JOIN subcategory s
-      ON s.id = gs.subcategory_id
-    WHERE
-      g.id = gs.gen_id
-  ) AS subcategories,
-  (
-    SELECT
-      array_agg(t.name)
-    FROM
-      gen_tag gt
-    JOIN tag t
-      ON t.id = gt.tag_id
-    WHERE
-      g.id = gt.gen_id
-  ) AS tags,
-  (
-    SELECT
-      COALESCE(array_agg(user_id), ARRAY[]::int[])
-    FROM
-      gen_like
-    WHERE
-      gen_id = g.id
-  ) as likes,
-  (
-    SELECT
-      count(*)
-    FROM
-      gen_like
-    WHERE
-      g.id = gen_id
-  ) AS likes_count,
-  (
-    SELECT
-      COALESCE(array_agg(user_id), ARRAY[]::int[])
-    FROM
-      gen_fav
-    WHERE
-      gen_id = g.id
-  ) as favs,
-  (
-    SELECT
-      count(*)
-    FROM
-      gen_fav
-    WHERE
-      g.id = gen_id
-  ) AS favs_count
+  gs.subcategories,
+  gs.tags,
+  gs.likes_count,
+  gs.favs_count,
+  COUNT(*) OVER() AS total
 FROM
-  gen g
-JOIN gen_feature gegf
-  ON g.id = gegf.gen_id
-JOIN feature egf
-  ON egf.id = gegf.feature_id
-LEFT JOIN category c
-  ON c.id = g.category_id
+  gen_search gs
+JOIN gen g
+  ON g.id = gs.gen_id
 JOIN auth_user au
-  ON g.user_id = au.id
+  ON au.id = g.user_id
 WHERE
-  ($3::text IS NULL OR g.title iLIKE CONCAT('%', $3::text, '%'))
-  AND ($4::text IS NULL OR $4::text = (
-    SELECT
-      c.name
-    FROM
-      category c
-    WHERE
-      c.id = g.category_id
-  ))
-  AND ($5::text[] IS NULL OR $5::text[] && (
-    SELECT
-      array_remove(array_agg(s.name), NULL)
-    FROM
-      gen_subcategory gs
-    JOIN subcategory s
-      ON s.id = gs.subcategory_id
-    WHERE
-      g.id = gs.gen_id
-  ))
-  AND ($6::text[] IS NULL OR $6::text[] && (
-    SELECT
-      array_agg(t.name)
-    FROM
-      gen_tag gt
-    JOIN tag t
-      ON t.id = gt.tag_id
-    WHERE
-      g.id = gt.gen_id
-  ))
-  AND ($7::int IS NULL OR g.access = $7::int)
-  AND ($8::boolean IS NULL OR g.active = $8::boolean)
-GROUP BY g.id
-ORDER BY {} {}
+  ($3::text IS NULL OR gs.title iLIKE CONCAT('%', $3::text, '%'))
+  AND ($4::text IS NULL OR gs.category = $4::text)
+  AND ($5::text[] IS NULL OR gs.subcategories && $5::text[])
+  AND ($6::text[] IS NULL OR gs.tags && $6::text[])
+  AND ($7::int IS NULL OR gs.access = $7::int)
+  AND ($8::boolean IS NULL OR gs.active = $8::boolean)
+ORDER BY {0} {1}, gs.gen_id {1}
 LIMIT $2::int OFFSET $1::int;
 
 
+-- name: search_after
+SELECT
+  g.id,
+  g.user_id,
+  au.username,
+  g.title,
+  g.description,
+  g.access,
+  gs.category,
+  g.views,
+  g.date_added,
+  g.date_updated,
+
+  g.variations,
+  g.active,
+  g.ads,
+  g.copyright,
+
+  gs.generator,
+  g.format,
+  gs.subcategories,
+  gs.tags,
+  gs.likes_count,
+  gs.favs_count
+FROM
+  gen_search gs
+JOIN gen g
+  ON g.id = gs.gen_id
+JOIN auth_user au
+  ON au.id = g.user_id
+WHERE
+  ($2::text IS NULL OR gs.title iLIKE CONCAT('%', $2::text, '%'))
+  AND ($3::text IS NULL OR gs.category = $3::text)
+  AND ($4::text[] IS NULL OR gs.subcategories && $4::text[])
+  AND ($5::text[] IS NULL OR gs.tags && $5::text[])
+  AND ($6::int IS NULL OR gs.access = $6::int)
+  AND ($7::boolean IS NULL OR gs.active = $7::boolean)
+  AND ({0}, gs.gen_id) < ({2}, $9::int)
+ORDER BY {0} {1}, gs.gen_id {1}
+LIMIT $1::int;
+
+
 -- name: get_stats
 SELECT
   (
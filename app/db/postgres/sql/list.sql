@@ -23,6 +23,15 @@ FROM
 WHERE
 	l.id = $1;
 
+-- name: get_many
+SELECT
+	l.*,
+	(SELECT username FROM auth_user WHERE id = user_id)
+FROM
+	list l
+WHERE
+	l.id = ANY($1::int[]);
+
 -- name: create
 INSERT INTO
 	list(
@@ -72,6 +81,28 @@ GROUP BY l.id
 ORDER BY {} {}
 LIMIT $2::int OFFSET $1::int;
 
+-- name: search_after
+SELECT
+  l.id,
+  l.user_id,
+  (
+    SELECT username FROM auth_user WHERE id = l.user_id
+  ),
+  l.title,
+  l.description,
+  l.access,
+  l.date_added,
+  l.date_updated,
+  l.active
+FROM
+  list l
+WHERE
+  ($2::text IS NULL OR l.title iLIKE CONCAT('%', $2::text, '%'))
+  AND ($3::int IS NULL OR l.access = $3::int)
+  AND {0} < $4::int
+ORDER BY {0} {1}
+LIMIT $1::int;
+
 -- name: search_count
 SELECT
   COUNT(1)
@@ -0,0 +1,224 @@
+import time
+from enum import Enum, IntEnum
+from typing import Optional
+
+from app.config import WEB_CONCURRENCY
+from app.db.redis import RedisCache
+from app.utils.lru import LRUCache
+
+# KEYS: ban, current window, previous window
+# ARGV: limit, cost, window ms, ban ms, elapsed part of current window
+SLIDING_WINDOW_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return 1
+end
+
+local limit = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local elapsed = tonumber(ARGV[5])
+
+local current = tonumber(redis.call('GET', KEYS[2]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[3]) or '0')
+if previous * (1 - elapsed) + current + cost > limit then
+  redis.call('SET', KEYS[1], 1, 'PX', ARGV[4])
+  return 2
+end
+
+redis.call('INCRBY', KEYS[2], cost)
+redis.call('PEXPIRE', KEYS[2], window * 2)
+return 0
+"""
+
+# KEYS: ban, bucket
+# ARGV: limit, cost, window ms, ban ms, now ms
+# bucket holds limit tokens and refills limit tokens per window
+TOKEN_BUCKET_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+  return 1
+end
+
+local limit = tonumber(ARGV[1])
+local cost = tonumber(ARGV[2])
+local window = tonumber(ARGV[3])
+local now = tonumber(ARGV[5])
+
+local bucket = redis.call('HMGET', KEYS[2], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+  tokens = limit
+  ts = now
+end
+
+tokens = math.min(limit, tokens + math.max(0, now - ts) * limit / window)
+if tokens < cost then
+  redis.call('SET', KEYS[1], 1, 'PX', ARGV[4])
+  return 2
+end
+
+redis.call('HSET', KEYS[2], 'tokens', tostring(tokens - cost), 'ts', ARGV[5])
+redis.call('PEXPIRE', KEYS[2], window)
+return 0
+"""
+
+
+class RateLimitMode(str, Enum):
+    SLIDING_WINDOW = "sliding_window"
+    TOKEN_BUCKET = "token_bucket"
+
+
+class RateLimitStatus(IntEnum):
+    OK = 0
+    # was banned before this request
+    BANNED = 1
+    # this request exceeded the limit, banned from now on
+    EXCEEDED = 2
+
+
+class RateLimiter:
+    """
+    Ban check, hit and ban in one round trip (single Lua script).
+
+    {prefix}:{ip} - counters, {prefix}_ban:{ip} - ban
+    """
+
+    def __init__(
+        self,
+        cache: RedisCache,
+        prefix: str,
+        mode: RateLimitMode = RateLimitMode.SLIDING_WINDOW,
+        window: float = 1,
+        ban: float = 4,
+    ) -> None:
+        self._cache = cache
+        self._prefix = prefix
+        self._mode = mode
+        self._window_ms = int(window * 1000)
+        self._ban_ms = int(ban * 1000)
+
+    @property
+    def window(self) -> float:
+        return self._window_ms / 1000
+
+    @property
+    def ban(self) -> float:
+        return self._ban_ms / 1000
+
+    async def hit(self, ip: str, limit: int, cost: int = 1) -> RateLimitStatus:
+        """
+        cost - how many requests this one counts as
+        """
+        now_ms = int(time.time() * 1000)
+        ban_key = f"{self._prefix}_ban:{ip}"
+        args = [limit, cost, self._window_ms, self._ban_ms]
+
+        match self._mode:
+            case RateLimitMode.SLIDING_WINDOW:
+                current, elapsed = divmod(now_ms, self._window_ms)
+                res = await self._cache.eval_script(
+                    SLIDING_WINDOW_SCRIPT,
+                    [
+                        ban_key,
+                        f"{self._prefix}:{ip}:{current}",
+                        f"{self._prefix}:{ip}:{current - 1}",
+                    ],
+                    [*args, elapsed / self._window_ms],
+                )
+            case RateLimitMode.TOKEN_BUCKET:
+                res = await self._cache.eval_script(
+                    TOKEN_BUCKET_SCRIPT,
+                    [ban_key, f"{self._prefix}:{ip}"],
+                    [*args, now_ms],
+                )
+
+        return RateLimitStatus(int(res))
+
+    async def ban_left(self, ip: str) -> float:
+        """Seconds until the ban ends, 0 if not banned"""
+        pttl = await self._cache.pttl(f"{self._prefix}_ban:{ip}")
+        return max(pttl, 0) / 1000
+
+
+class _LocalState:
+    __slots__ = ("tokens", "ts", "pending", "pending_since", "banned_until")
+
+    def __init__(self, tokens: float, ts: float) -> None:
+        self.tokens = tokens
+        self.ts = ts
+        # hits allowed locally, not reported to redis yet
+        self.pending = 0
+        self.pending_since = ts
+        self.banned_until = 0.0
+
+
+class LocalRateLimiter:
+    """
+    Per-worker pre-filter in front of RateLimiter, no redis for most hits.
+
+    Each ip gets a local bucket of share * limit tokens per window.
+    While it has tokens, hits are allowed locally and only counted.
+    Counted hits are reported to redis in one call, which has the final
+    say, when the bucket runs dry (ip is near the limit) or on the first
+    hit after a window since the oldest of them, whichever comes first.
+    Bans from redis are remembered locally until they expire.
+
+    share defaults to half of the limit split between the workers,
+    so all of them together stay under the limit without redis.
+    NOTE: up to share * limit hits per worker reach redis a window late.
+    """
+
+    def __init__(self, maxsize: int = 10_000, share: Optional[float] = None) -> None:
+        if share is None:
+            share = 0.5 / WEB_CONCURRENCY
+        self._share = share
+        self._states: LRUCache[_LocalState] = LRUCache(maxsize)
+
+    async def hit(
+        self,
+        limiter: RateLimiter,
+        ip: str,
+        limit: int,
+        cost: int = 1,
+    ) -> RateLimitStatus:
+        now = time.monotonic()
+        quota = int(limit * self._share)
+
+        state = self._states.get(ip)
+        if state is None:
+            state = _LocalState(quota, now)
+            self._states.set(ip, state)
+
+        if state.banned_until > now:
+            return RateLimitStatus.BANNED
+
+        state.tokens = min(
+            quota,
+            state.tokens + (now - state.ts) * quota / limiter.window,
+        )
+        state.ts = now
+
+        # counted hits are a window old, redis must see them now
+        overdue = state.pending > 0 and now - state.pending_since >= limiter.window
+
+        if state.tokens >= cost and not overdue:
+            state.tokens -= cost
+            if state.pending == 0:
+                state.pending_since = now
+            state.pending += cost
+            return RateLimitStatus.OK
+
+        if state.tokens >= cost:
+            state.tokens -= cost
+
+        reported = state.pending + cost
+        if reported > limit and not overdue:
+            # big batch, don't let old local hits alone push it over
+            reported = cost
+        state.pending = 0
+        state.pending_since = now
+        status = await limiter.hit(ip, limit, reported)
+        if status != RateLimitStatus.OK:
+            state.banned_until = now + await limiter.ban_left(ip)
+
+        return status
@@ -1,7 +1,13 @@
 import asyncio
-from typing import List, Optional
+from typing import Any, Dict, List, Mapping, Optional
 
 from aioredis import Redis
+from aioredis.client import Pipeline, Script
+
+from app.db.background import background_queue
+
+# per worker, script source -> Script (sha1 computed once)
+_scripts: Dict[str, Script] = {}
 
 
 class RedisCache:
@@ -10,17 +16,44 @@ class RedisCache:
         self.background_tasks: List[asyncio.Task] = []
 
     def background(self, fut) -> None:
+        """
+        Runs fut after the request, on the app background queue.
+        If the queue is full (or not started), the request runs it
+        and waits for it before returning (see get_repo).
+        NOTE: fut must not use the request's connection, pool client only.
+        """
+        if background_queue.submit(fut):
+            return
+
         task = asyncio.create_task(fut)
         self.background_tasks.append(task)
 
+    def pipeline(self) -> Pipeline:
+        """
+        MULTI/EXEC batch, commands are sent in one round trip on execute:
+
+        pipe = cache.pipeline()
+        pipe.get(key1).get(key2)
+        value1, value2 = await pipe.execute()
+        """
+        return self.conn.pipeline(transaction=True)
+
+    async def eval_script(self, script: str, keys: List[str], args: List) -> Any:
+        """EVALSHA, loads the script on first use"""
+        registered = _scripts.get(script)
+        if registered is None:
+            registered = self.conn.register_script(script)
+            _scripts[script] = registered
+        return await registered(keys=keys, args=args, client=self.conn)
+
     async def get(self, key: str) -> Optional[str]:
         return await self.conn.get(key)
 
     async def mget(self, keys: List[str]) -> List[Optional[str]]:
         return await self.conn.mget(keys)
 
-    async def delete(self, key: str) -> None:
-        await self.conn.delete(key)
+    async def delete(self, *keys: str) -> None:
+        await self.conn.delete(*keys)
 
     async def keys(self, match: str) -> List[str]:
         return await self.conn.keys(match)
@@ -28,11 +61,12 @@ class RedisCache:
     async def set(self, key: str, value: str | int | bytes, ex: int) -> None:
         await self.conn.set(key, value, ex=ex)
 
-    async def setnx(self, key: str, value: str | int | bytes, ex: int) -> None:
-        await self.conn.set(key, value, ex=ex, nx=True)
+    async def setnx(self, key: str, value: str | int | bytes, ex: int) -> bool:
+        """True if key was set"""
+        return bool(await self.conn.set(key, value, ex=ex, nx=True))
 
-    async def incr(self, key: str) -> int:
-        return int(await self.conn.incr(key))
+    async def incr(self, key: str, amount: int = 1) -> int:
+        return int(await self.conn.incr(key, amount))
 
     async def decr(self, key: str) -> int:
         return int(await self.conn.decr(key))
@@ -45,6 +79,25 @@ class RedisCache:
         """
         return await self.conn.ttl(key)
 
+    async def pttl(self, key: str) -> int:
+        """ttl in ms"""
+        return await self.conn.pttl(key)
+
+    async def hget(self, key: str, field: str | int) -> Optional[str]:
+        return await self.conn.hget(key, field)
+
+    async def hgetall(self, key: str) -> Dict[str, str]:
+        return await self.conn.hgetall(key)
+
+    async def hset(self, key: str, mapping: Mapping[str, str | int | bytes]) -> None:
+        await self.conn.hset(key, mapping=mapping)
+
+    async def hdel(self, key: str, field: str | int) -> None:
+        await self.conn.hdel(key, field)
+
+    async def lrange(self, key: str, start: int, end: int) -> List[str]:
+        return await self.conn.lrange(key, start, end)
+
     async def sadd_single(self, key: str, value: int) -> None:
         await self.conn.sadd(key, value)
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, TypedDict
 
 from fastapi import HTTPException
 from fastapi_auth import User
@@ -30,9 +30,7 @@ class GeneratorEntity(BaseModel):
     variations: int
     hash: Optional[str] = None
 
-    likes: List[int]
     likes_count: int
-    favs: List[int]
     favs_count: int
     views: int
 
@@ -96,3 +94,42 @@ class GeneratorEntity(BaseModel):
 
         if not self.is_owner(user):
             raise HTTPException(403)
+
+
+class GeneratorSearchRow(TypedDict):
+    """
+    Lean row for search and preview, enough for PublicInfo.
+    No body, features or access key: see GeneratorEntity for the full one.
+    """
+
+    id: int
+    user_id: int
+    username: str
+    user: dict
+
+    title: str
+    description: str
+    access: int
+    category: Optional[str]
+    subcategories: List[str]
+    tags: List[str]
+
+    generator: str
+    format: dict
+    variations: int
+
+    likes_count: int
+    favs_count: int
+    views: int
+
+    date_added: datetime
+    date_updated: datetime
+
+    active: bool
+    ads: bool
+    copyright: bool
+
+
+class GeneratorSitemapRow(TypedDict):
+    id: int
+    date_updated: datetime
@@ -1,3 +1,4 @@
+from datetime import datetime
 from enum import IntEnum
 from typing import List, Optional
 
@@ -6,9 +7,20 @@ from fastapi_auth import User
 from pydantic import BaseModel
 
 from app.entities.common import Owner
+from app.utils.lru import LRUCache
 
 SLICERS = (",", "\n", ".", ";")
 
+# variants in total, per worker
+VARIANTS_CACHE_SIZE = 1_000_000
+# admin edits keep date_updated, same staleness as hornet PLAN_CACHE_TTL
+VARIANTS_CACHE_TTL = 60
+
+# (id, date_updated, len(content)) -> variants, see ListEntity.get_variants
+_variants: LRUCache[List[str]] = LRUCache(
+    VARIANTS_CACHE_SIZE, VARIANTS_CACHE_TTL, weigh=len
+)
+
 
 class ListAccess(IntEnum):
     PUBLIC = 0
@@ -28,6 +40,8 @@ class ListEntity(BaseModel):
     content: str
     slicer: int
 
+    date_updated: Optional[datetime] = None
+
     def is_owner(self, user: Optional[User]) -> bool:
         return user is not None and user.is_authenticated() and self.user.id == user.id
 
@@ -64,4 +78,19 @@ class ListEntity(BaseModel):
             raise HTTPException(403)
 
     def get_variants(self) -> List[str]:
+        """
+        Cached per worker by version of the list,
+        the result is shared: don't mutate it.
+        """
+        if self.date_updated is None:
+            return self._split()
+
+        key = (self.id, self.date_updated, len(self.content))
+        variants = _variants.get(key)
+        if variants is None:
+            variants = self._split()
+            _variants.set(key, variants)
+        return variants
+
+    def _split(self) -> List[str]:
         return [v.strip() for v in self.content.split(SLICERS[self.slicer])]
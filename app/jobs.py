@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from aioredis import Redis
+from asyncpg import Pool
+
+from app.db.postgres import PostgresDB
+from app.db.redis import RedisCache
+from app.repo.gens import GensRepo
+from app.repo.settings import SettingsRepo
+
+VIEWS_FLUSH_INTERVAL = 10
+COUNTS_RECONCILE_INTERVAL = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+async def flush_views(db_pool: Pool, cache_pool: Redis) -> None:
+    async with db_pool.acquire() as db_conn:
+        async with cache_pool.client() as cache_conn:
+            repo = GensRepo(PostgresDB(db_conn), RedisCache(cache_conn))
+            await repo.flush_views()
+
+
+async def reconcile_counts(db_pool: Pool, cache_pool: Redis) -> None:
+    async with db_pool.acquire() as db_conn:
+        repo = GensRepo(PostgresDB(db_conn), RedisCache(cache_pool))
+        fixed = await repo.reconcile_counts(COUNTS_RECONCILE_INTERVAL)
+        if fixed:
+            logger.warning("reconciled %s gens counts", fixed)
+
+
+async def periodic(
+    interval: float,
+    job: Callable[[], Awaitable[None]],
+) -> None:
+    """
+    Runs job every interval seconds until cancelled.
+    Errors are logged, the next run retries.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await job()
+        except Exception:
+            logger.exception("periodic job %s failed", job)
+
+
+async def listen_settings(cache_pool: Redis) -> None:
+    """
+    Drops this worker's settings snapshot when a setting is changed
+    on any worker, see SettingsRepo.refresh.
+    Resubscribes on errors until cancelled.
+    """
+    while True:
+        try:
+            async with cache_pool.pubsub() as pubsub:
+                await pubsub.subscribe(SettingsRepo.channel)
+                # changes made while unsubscribed
+                SettingsRepo.invalidate()
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        SettingsRepo.invalidate()
+        except Exception:
+            logger.exception("settings listener failed")
+            await asyncio.sleep(1)
@@ -1,7 +1,7 @@
+import asyncio
 import os
 
 import aioredis
-import asyncpg
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import ORJSONResponse
@@ -9,6 +9,8 @@ from starlette.middleware.sessions import SessionMiddleware
 
 from app.config import (
     API_USERS_PREFIX,
+    BACKGROUND_QUEUE_SIZE,
+    BACKGROUND_WORKERS,
     CACHE_URL,
     DATABASE_HOST,
     DATABASE_NAME,
@@ -22,8 +24,18 @@ from app.config import (
     SECRET_KEY,
     VERSION,
 )
+from app.db.background import background_queue
 from app.db.postgres import PostgresDB
+from app.db.postgres.pool import open_pool
 from app.db.redis import RedisCache
+from app.jobs import (
+    COUNTS_RECONCILE_INTERVAL,
+    VIEWS_FLUSH_INTERVAL,
+    flush_views,
+    listen_settings,
+    periodic,
+    reconcile_counts,
+)
 from app.logger import Logger
 from app.repo.settings import SettingsRepo
 
@@ -56,7 +68,7 @@ def get_app() -> FastAPI:
 
     async def open_connection():
         db_dsn = f"postgres://{DATABASE_USERNAME}:{DATABASE_PASSWORD}@{DATABASE_HOST}:{DATABASE_PORT}/{DATABASE_NAME}"
-        app.state.db_pool = await asyncpg.create_pool(db_dsn)
+        app.state.db_pool = await open_pool(db_dsn)
         cache_dsn = CACHE_URL
         app.state.cache_pool = aioredis.from_url(cache_dsn, decode_responses=True)
         if DEBUG:
@@ -69,8 +81,37 @@ def get_app() -> FastAPI:
                 settings_repo = SettingsRepo(pg, rs)
                 await settings_repo.on_startup()
 
+        background_queue.start(
+            app.state.db_pool,
+            BACKGROUND_WORKERS,
+            BACKGROUND_QUEUE_SIZE,
+        )
+        app.state.jobs = [
+            asyncio.create_task(
+                periodic(
+                    VIEWS_FLUSH_INTERVAL,
+                    lambda: flush_views(app.state.db_pool, app.state.cache_pool),
+                )
+            ),
+            asyncio.create_task(
+                periodic(
+                    COUNTS_RECONCILE_INTERVAL,
+                    lambda: reconcile_counts(app.state.db_pool, app.state.cache_pool),
+                )
+            ),
+            asyncio.create_task(listen_settings(app.state.cache_pool)),
+        ]
+
     async def close_connection():
-        await app.state.db_pool.close()
+        for job in app.state.jobs:
+            job.cancel()
+        await asyncio.gather(*app.state.jobs, return_exceptions=True)
+        await background_queue.stop()
+        try:
+            # on failure the views are put back to redis, see flush_views
+            await flush_views(app.state.db_pool, app.state.cache_pool)
+        finally:
+            await app.state.db_pool.close()
 
     app.add_event_handler("startup", open_connection)
     app.add_event_handler("shutdown", close_connection)
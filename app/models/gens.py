@@ -68,8 +68,10 @@ class SearchParams(DefaultModel):
     sort: Optional[SearchSort] = Field(SearchSort.LIKES, alias="f")
     tags: Optional[List[str]] = Field(None, alias="t")
     p: int = 1
+    # keyset cursor, replaces p when set
+    after: Optional[str] = None
 
-    @validator("category", "title", "sort")
+    @validator("category", "title", "sort", "after")
     def check_single(cls, v):
         if v and (isinstance(v, str) and v.strip() != ""):
             return v
@@ -148,8 +150,10 @@ class EditorInfo(PublicInfo):
 
 class Search(DefaultModel):
     items: List[PublicInfo]
-    pages: int
+    # None for keyset pages
+    pages: Optional[int] = None
     current_page: int
+    next: Optional[str] = None
 
 
 """
@@ -194,6 +198,10 @@ class Result(BaseModel):
     msg: str
 
 
+class Results(BaseModel):
+    msg: List[str]
+
+
 class ChangeKey(DefaultModel):
     access_key: str
 
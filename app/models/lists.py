@@ -11,8 +11,10 @@ CONTENT_LIMIT_BYTES = 16_000
 class SearchParams(DefaultModel):
     title: Optional[str] = Field(None, alias="q")
     p: int = 1
+    # keyset cursor, replaces p when set
+    after: Optional[str] = None
 
-    @validator("title")
+    @validator("title", "after")
     def check_q(cls, v):
         if v and (isinstance(v, str) and v.strip() != ""):
             return v
@@ -44,8 +46,10 @@ class Info(PublicInfo):
 
 class Search(DefaultModel):
     items: List[PublicInfo]
-    pages: int
+    # None for keyset pages
+    pages: Optional[int] = None
     current_page: int
+    next: Optional[str] = None
 
 
 if LANGUAGE == "RU":
@@ -1,16 +1,24 @@
-import time
 from typing import Any, Callable, List, Optional, Tuple
 
 import orjson
 
 from app.db.postgres import PostgresDB
+from app.db.ratelimit import (
+    LocalRateLimiter,
+    RateLimiter,
+    RateLimitMode,
+    RateLimitStatus,
+)
 from app.db.redis import RedisCache
 
+# per worker
+_local_ratelimit = LocalRateLimiter()
+
 
 class GeneralRepo:
     info_key: str = "general:info"
-    ban_prefix: str = "general:ratelimit_ban"
     ratelimit_prefix: str = "general:ratelimit"
+    ratelimit_mode: RateLimitMode = RateLimitMode.SLIDING_WINDOW
 
     def __init__(self, db: PostgresDB, cache: RedisCache) -> None:
         self._db = db
@@ -39,26 +47,9 @@ class GeneralRepo:
     async def get_all_info(self) -> List[dict]:
         return await self._get(self.info_key, self._db.general.get_all_info)
 
-    async def in_ratelimit_ban(self, ip: str) -> bool:
-        key = f"{self.ban_prefix}:{ip}"
-        return bool(await self._cache.get(key))
-
-    async def ratelimit_exceeded(self, ip: str, limit: int) -> bool:
-        ts = int(time.time())
-        key = f"{self.ratelimit_prefix}:{ip}:{ts}"
-        ratelimit = await self._cache.get(key)
-
-        if ratelimit is not None:
-            ratelimit = int(ratelimit)  # type: ignore
-            if ratelimit > limit:  # type: ignore
-                ban_key = f"{self.ban_prefix}:{ip}"
-                await self._cache.set(ban_key, 1, ex=4)
-                return True
-        else:
-            await self._cache.set(key, 1, ex=2)
-
-        await self._cache.incr(key)
-        return False
+    async def ratelimit(self, ip: str, limit: int) -> RateLimitStatus:
+        limiter = RateLimiter(self._cache, self.ratelimit_prefix, self.ratelimit_mode)
+        return await _local_ratelimit.hit(limiter, ip, limit)
 
     async def _delete_plot_count_from_cache(self) -> None:
         await self._cache.delete(f"{self.info_key}:plot:count")
@@ -1,6 +1,6 @@
-import asyncio
+import hashlib
 import time
-from typing import List, Optional, Tuple
+from typing import AsyncIterator, Callable, List, Optional, Tuple
 
 import orjson
 from fastapi_auth import User
@@ -8,86 +8,113 @@ from fastapi_auth import User
 from app.config import DEBUG
 from app.core.head import Head
 from app.core.metadata import Metadata
+from app.db.derived import DerivedCache
 from app.db.postgres import PostgresDB
+from app.db.ratelimit import (
+    LocalRateLimiter,
+    RateLimiter,
+    RateLimitMode,
+    RateLimitStatus,
+)
 from app.db.redis import RedisCache
-from app.entities.gens import GeneratorEntity
+from app.entities.gens import (
+    GeneratorEntity,
+    GeneratorSearchRow,
+    GeneratorSitemapRow,
+)
 from app.models.gens import SearchParams, SearchSort, Suggestion
 from app.utils.strings import create_random_string
 
 SESSIONS_PER_USER = 15
+SEARCH_CACHE_TTL = 60
+RESET_BATCH_SIZE = 1000
+
+# sitemap protocol limit per file
+SITEMAP_MAX_URLS = 50_000
+SITEMAP_CHUNK_SIZE = 1000
+# chunks per LRANGE when serving
+SITEMAP_READ_CHUNKS = 10
+SITEMAP_CACHE_TTL = 60 * 60 * 24
+SITEMAP_CACHE_STALE = 60 * 60
+# pages outlive the {stamp, pages} that points to them
+SITEMAP_PAGES_TTL = 2 * SITEMAP_CACHE_TTL
+# replaced pages are kept this long, for streams already reading them
+SITEMAP_REPLACED_TTL = 5 * 60
+# a full pass over the cursor, other requests wait for it that long
+SITEMAP_BUILD_TIMEOUT = 5 * 60
+
+SitemapRender = Callable[[AsyncIterator[GeneratorSitemapRow]], AsyncIterator[str]]
+# categories, preview, tags, titles, suggestions: fresh for TTL,
+# then served stale for up to STALE more while being recomputed
+DERIVED_CACHE_TTL = 600
+DERIVED_CACHE_STALE = 600
+
+# per worker
+_local_ratelimit = LocalRateLimiter()
 
 
 class GensRepo:
     prefix = "gens"
     views_prefix: str = "gens:views"
-    likes_prefix: str = "gens:likes"
-    favs_prefix: str = "gens:favs"
+    views_pending_key: str = "gens:views:pending"
+    social_prefix: str = "gens:social"
     likes_count_prefix: str = "gens:likes_count"
     favs_count_prefix: str = "gens:favs_count"
     preview_key: str = "gens:preview"
     categories_key: str = "gens:categories"
     tags_key: str = "gens:tags"
+    titles_key: str = "gens:titles"
+    suggestions_key: str = "gens:suggestions"
+    sitemap_key: str = "gens:sitemap"
+    counts_reconcile_key: str = "gens:counts:reconcile"
+    search_prefix: str = "gens:search"
+    search_version_key: str = "gens:search:version"
 
     editor_rate_key: str = "gens:editor_rate"
 
+    ratelimit_prefix: str = "gens:ratelimit"
+    ratelimit_mode: RateLimitMode = RateLimitMode.SLIDING_WINDOW
+
     create_session_prefix: str = "gens:session:create"
     edit_session_prefix: str = "gens:session:edit"
 
     def __init__(self, db: PostgresDB, cache: RedisCache) -> None:
         self._db = db
         self._cache = cache
+        self._derived = DerivedCache(db, cache)
 
     async def get(self, id: int) -> Optional[GeneratorEntity]:
         row_key = f"{self.prefix}:{id}"
         views_key = f"{self.views_prefix}:{id}"
-        likes_key = f"{self.likes_prefix}:{id}"
-        favs_key = f"{self.favs_prefix}:{id}"
         likes_count_key = f"{self.likes_count_prefix}:{id}"
         favs_count_key = f"{self.favs_count_prefix}:{id}"
 
-        c_row = await self._cache.get(row_key)
+        pipe = self._cache.pipeline()
+        pipe.get(row_key)
+        pipe.get(views_key)
+        pipe.get(likes_count_key)
+        pipe.get(favs_count_key)
+        c_row, c_views, c_likes_count, c_favs_count = await pipe.execute()
+
         if c_row is None:
             row = await self._db.gens.get(id)
             if row is None:
                 return None
 
-            await self._cache.set(
-                row_key,
-                orjson.dumps(row),
-                120,
-            )
-            await self._cache.set(
-                views_key,
-                row.get("views"),  # type: ignore
-                140,
-            )
-            await self._cache.delete(likes_key)
-            await self._cache.sadd_multiple(
-                likes_key,
-                row.get("likes"),  # type: ignore
-            )
-            await self._cache.delete(favs_key)
-            await self._cache.sadd_multiple(
-                favs_key,
-                row.get("favs"),  # type: ignore
-            )
-            await self._cache.set(
-                favs_count_key,
-                row.get("favs_count"),  # type: ignore
-                140,
-            )
-            await self._cache.set(
-                likes_count_key,
-                row.get("likes_count"),  # type: ignore
-                140,
-            )
-            return GeneratorEntity(**row)
+            # views that are not flushed to db yet, read after the row:
+            # read before, a flush in between would count them twice
+            c_views_pending = await self._cache.hget(self.views_pending_key, id)
+            if c_views_pending is not None:
+                row["views"] += int(c_views_pending)
 
-        c_views = await self._cache.get(views_key)
-        c_likes = await self._cache.smembers(likes_key)
-        c_favs = await self._cache.smembers(favs_key)
-        c_likes_count = await self._cache.get(likes_count_key)
-        c_favs_count = await self._cache.get(favs_count_key)
+            pipe = self._cache.pipeline()
+            pipe.set(row_key, orjson.dumps(row), ex=120)
+            pipe.set(views_key, row.get("views"), ex=140)  # type: ignore
+            pipe.set(favs_count_key, row.get("favs_count"), ex=140)  # type: ignore
+            pipe.set(likes_count_key, row.get("likes_count"), ex=140)  # type: ignore
+            await pipe.execute()
+
+            return GeneratorEntity(**row)
 
         assert c_views is not None
         assert c_likes_count is not None
@@ -95,21 +122,40 @@ class GensRepo:
 
         row = orjson.loads(c_row)
         views = int(c_views)
-        likes = [int(v) for v in c_likes]
-        favs = [int(v) for v in c_favs]
         likes_count = int(c_likes_count)
         favs_count = int(c_favs_count)
         row["views"] = views
-        row["likes"] = likes
-        row["favs"] = favs
         row["likes_count"] = likes_count
         row["favs_count"] = favs_count
         return GeneratorEntity(**row)
 
+    async def get_liked_and_faved(self, id: int, user_id: int) -> Tuple[bool, bool]:
+        """
+        Probe for a single user instead of loading everyone who liked.
+        Cached per user: gens:social:{user_id} -> {l:{id}: 1, f:{id}: 0}
+        The probe only fills missing fields (HSETNX), like and fav write
+        the state after the toggle, so a late probe can't undo a toggle.
+        """
+        key = f"{self.social_prefix}:{user_id}"
+        pipe = self._cache.pipeline()
+        pipe.hget(key, f"l:{id}")
+        pipe.hget(key, f"f:{id}")
+        c_liked, c_faved = await pipe.execute()
+        if c_liked is not None and c_faved is not None:
+            return c_liked == "1", c_faved == "1"
+
+        liked, faved = await self._db.gens.get_liked_and_faved(id, user_id)
+
+        pipe = self._cache.pipeline()
+        pipe.hsetnx(key, f"l:{id}", int(liked))
+        pipe.hsetnx(key, f"f:{id}", int(faved))
+        pipe.expire(key, 600)
+        self._cache.background(pipe.execute())
+
+        return liked, faved
+
     async def reset_cache(self, id: int) -> None:
         await self._cache.delete(f"{self.prefix}:{id}")
-        await self._cache.delete(f"{self.likes_prefix}:{id}")
-        await self._cache.delete(f"{self.favs_prefix}:{id}")
 
     async def get_all_vh(self, user_id: int) -> List[dict]:
         return await self._db.gens.get_all_vh(user_id)
@@ -136,6 +182,8 @@ class GensRepo:
         if head.access == 0:
             await self.reset_preview()
             await self.reset_categories()
+            await self.reset_search()
+            await self.reset_sitemap()
 
         await self._cache.setnx(self.editor_rate_key, 0, ex=3600)
         await self._cache.incr(self.editor_rate_key)
@@ -155,6 +203,8 @@ class GensRepo:
         await self.reset_cache(id)
         await self.reset_preview()
         await self.reset_categories()
+        await self.reset_search()
+        await self.reset_sitemap()
         return res
 
     async def delete(self, id: int) -> bool:
@@ -162,6 +212,8 @@ class GensRepo:
         await self.reset_cache(id)
         await self.reset_preview()
         await self.reset_categories()
+        await self.reset_search()
+        await self.reset_sitemap()
         return res
 
     # SEARCH
@@ -170,126 +222,190 @@ class GensRepo:
         search_params: SearchParams,
         limit: int,
         is_admin: bool,
-    ) -> Tuple[List[dict], int]:
-        return await self._db.gens.search(search_params, limit, is_admin)
+    ) -> Tuple[List[GeneratorSearchRow], Optional[int]]:
+        """
+        Public pages are cached for SEARCH_CACHE_TTL seconds.
+        Cached value carries the search version, reset_search bumps it,
+        so both are read with one MGET.
+        """
+        if is_admin:
+            return await self._db.gens.search(search_params, limit, is_admin)
+
+        key = self._search_key(search_params, limit)
+        c_version, c_page = await self._cache.mget([self.search_version_key, key])
+        version = c_version or "0"
+        if c_page is not None:
+            page = orjson.loads(c_page)
+            if page.get("version") == version:
+                return page.get("items"), page.get("count")
+
+        items, count = await self._db.gens.search(search_params, limit, is_admin)
+        self._cache.background(
+            self._cache.set(
+                key,
+                orjson.dumps({"version": version, "items": items, "count": count}),
+                SEARCH_CACHE_TTL,
+            )
+        )
+        return items, count
+
+    def _search_key(self, search_params: SearchParams, limit: int) -> str:
+        # subcategories and tags are matched by overlap, order doesn't matter
+        params = search_params.dict(exclude_none=True)
+        for field in ("subcategories", "tags"):
+            if field in params:
+                params[field] = sorted(set(params[field]))
+        params["limit"] = limit
+        digest = hashlib.sha1(
+            orjson.dumps(params, option=orjson.OPT_SORT_KEYS)
+        ).hexdigest()
+        return f"{self.search_prefix}:{digest}"
+
+    async def reset_search(self) -> None:
+        await self._cache.incr(self.search_version_key)
 
     async def get_categories_and_count(self) -> List[dict]:
-        c_categories = await self._cache.get(self.categories_key)
-        if c_categories is not None:
-            return orjson.loads(c_categories)
-
-        categories = await self._db.gens.get_categories()
-        self._cache.background(
-            self._cache.set(self.categories_key, orjson.dumps(categories), 600)
+        return await self._derived.get(
+            self.categories_key,
+            lambda db: db.gens.get_categories(),
+            DERIVED_CACHE_TTL,
+            DERIVED_CACHE_STALE,
         )
-        return categories
 
     async def reset_categories(self) -> None:
-        await self._cache.delete(self.categories_key)
-
-    async def get_new_public(self, count: int) -> List[dict]:
-        c_items = await self._cache.get(self.preview_key)
-        if c_items is not None:
-            return orjson.loads(c_items)
-
-        p = SearchParams(sort=SearchSort.DATE_UPDATED)  # type: ignore
-        items, _ = await self._db.gens.search(
-            p,
-            count,
-            False,
+        await self._derived.reset(self.categories_key)
+
+    async def get_new_public(self, count: int) -> List[GeneratorSearchRow]:
+        async def compute(db: PostgresDB) -> List[GeneratorSearchRow]:
+            p = SearchParams(sort=SearchSort.DATE_UPDATED)  # type: ignore
+            items, _ = await db.gens.search(p, count, False)
+            return items
+
+        return await self._derived.get(
+            self.preview_key,
+            compute,
+            DERIVED_CACHE_TTL,
+            DERIVED_CACHE_STALE,
         )
-        self._cache.background(
-            self._cache.set(self.preview_key, orjson.dumps(items), 600)
-        )
-        return items
 
     def reset_preview_in_background(self) -> None:
-        self._cache.background(self._cache.delete(self.preview_key))
+        self._derived.reset_in_background(self.preview_key)
 
     async def reset_preview(self) -> None:
-        await self._cache.delete(self.preview_key)
+        await self._derived.reset(self.preview_key)
 
     async def get_sorted_public_tags_and_count(self) -> List[dict]:
-        c_items = await self._cache.get(self.tags_key)
-        if c_items is not None:
-            return orjson.loads(c_items)
-
-        items = await self._db.gens.get_tags()
-        self._cache.background(self._cache.set(self.tags_key, orjson.dumps(items), 600))
-        return items
+        return await self._derived.get(
+            self.tags_key,
+            lambda db: db.gens.get_tags(),
+            DERIVED_CACHE_TTL,
+            DERIVED_CACHE_STALE,
+        )
 
     async def reset_tags(self) -> None:
-        await self._cache.delete(self.tags_key)
+        await self._derived.reset(self.tags_key)
 
     async def get_titles(self) -> List[str]:
-        key = f"{self.prefix}:titles"
-        c_values = await self._cache.get(key)
-        if c_values is not None:
-            return orjson.loads(c_values)
-
-        values = await self._db.gens.get_titles()
-        self._cache.background(self._cache.set(key, orjson.dumps(values), 600))
-        return values
+        return await self._derived.get(
+            self.titles_key,
+            lambda db: db.gens.get_titles(),
+            DERIVED_CACHE_TTL,
+            DERIVED_CACHE_STALE,
+        )
 
     async def get_suggestions(self, threshold: int) -> List[dict]:
-        key = f"{self.prefix}:suggestions"
-        cache = await self._cache.get(key)
-        if cache is not None:
-            return orjson.loads(cache)
-
-        items = await self._db.gens.get_suggestions(threshold)
-
-        suggestions = [
-            Suggestion(
-                id=item.get("id"),  # type: ignore
-                title=item.get("title"),  # type: ignore
-                likes_count=item.get("likes_count"),  # type: ignore
-            ).dict(by_alias=True)
-            for item in items
-        ]
-
-        self._cache.background(
-            self._cache.set(key, orjson.dumps(suggestions), 600),
+        async def compute(db: PostgresDB) -> List[dict]:
+            items = await db.gens.get_suggestions(threshold)
+            return [
+                Suggestion(
+                    id=item.get("id"),  # type: ignore
+                    title=item.get("title"),  # type: ignore
+                    likes_count=item.get("likes_count"),  # type: ignore
+                ).dict(by_alias=True)
+                for item in items
+            ]
+
+        return await self._derived.get(
+            self.suggestions_key,
+            compute,
+            DERIVED_CACHE_TTL,
+            DERIVED_CACHE_STALE,
         )
 
-        return suggestions
-
     # VIEW
 
     def increment_views(self, id: int) -> None:
-        self._db.background(self._db.gens.increment_views(id))
-        key = f"{self.views_prefix}:{id}"
-        self._cache.background(self._cache.incr(key))
+        """
+        Buffered in gens:views:pending, flush_views writes it to db.
+        """
+        pipe = self._cache.pipeline()
+        pipe.hincrby(self.views_pending_key, id, 1)
+        pipe.incr(f"{self.views_prefix}:{id}")
+        self._cache.background(pipe.execute())
+
+    async def flush_views(self) -> int:
+        """
+        Moves buffered views to db in one UPDATE, returns number of gens.
+        HGETALL and DEL run in one MULTI, so concurrent flushes
+        (one per worker) never write the same increment twice.
+        """
+        pipe = self._cache.pipeline()
+        pipe.hgetall(self.views_pending_key)
+        pipe.delete(self.views_pending_key)
+        pending, _ = await pipe.execute()
+        if len(pending) == 0:
+            return 0
+
+        ids = [int(id) for id in pending.keys()]
+        deltas = [int(delta) for delta in pending.values()]
+        try:
+            await self._db.gens.add_views(ids, deltas)
+        except Exception:
+            # put them back for the next flush
+            pipe = self._cache.pipeline()
+            for id, delta in zip(ids, deltas):
+                pipe.hincrby(self.views_pending_key, id, delta)
+            await pipe.execute()
+            raise
+
+        return len(ids)
+
+    async def reconcile_counts(self, interval: int) -> Optional[int]:
+        """
+        Recounts category, subcategory and tag counts,
+        once per interval seconds for all workers.
+        Returns how many counts were off, None if another worker did it.
+        """
+        if not await self._cache.setnx(self.counts_reconcile_key, 1, interval):
+            return None
+
+        fixed = await self._db.gens.reconcile_counts()
+        if fixed > 0:
+            await self.reset_categories()
+            await self.reset_tags()
+
+        return fixed
 
     async def change_access_key(self, id: int, new_access_key: str) -> None:
         await self._db.gens.update_access_key(id, new_access_key)
         await self.reset_cache(id)
 
-    async def in_ratelimit_ban(self, ip: str) -> bool:
-        key = f"{self.prefix}:ratelimit_ban:{ip}"
-        return bool(await self._cache.get(key))
-
-    async def ratelimit_exceeded(self, ip: str, ratelimit: int) -> bool:
+    async def ratelimit(
+        self,
+        ip: str,
+        ratelimit: int,
+        cost: int = 1,
+    ) -> RateLimitStatus:
+        """
+        ratelimit - requests per second.
+        cost - how many results are requested at once,
+        batch of n counts as n requests.
+        """
         if DEBUG:
-            return False
-
-        ts = int(time.time())
-        key = f"{self.prefix}:ratelimit:{ip}:{ts}"
-
-        rate = await self._cache.get(key)
+            return RateLimitStatus.OK
 
-        if rate is not None:  # pragma: no cover
-            rate = int(rate)  # type: ignore
-            if rate > ratelimit:  # type: ignore
-                ban_key = f"{self.prefix}:ratelimit_ban:{ip}"
-                await self._cache.set(ban_key, 1, ex=4)
-                return True
-
-        else:
-            await self._cache.set(key, 1, ex=2)
-
-        await self._cache.incr(key)
-        return False
+        limiter = RateLimiter(self._cache, self.ratelimit_prefix, self.ratelimit_mode)
+        return await _local_ratelimit.hit(limiter, ip, ratelimit, cost)
 
     # EDITOR
 
@@ -386,49 +502,127 @@ class GensRepo:
 
     async def like(self, id: int, user_id: int) -> None:
         count_key = f"{self.likes_count_prefix}:{id}"
-        set_key = f"{self.likes_prefix}:{id}"
-        if await self._db.gens.toggle_like(id, user_id):
+        social_key = f"{self.social_prefix}:{user_id}"
+        liked = await self._db.gens.toggle_like(id, user_id)
+        if liked:
             self._cache.background(self._cache.incr(count_key))
-            self._cache.background(self._cache.sadd_single(set_key, user_id))
         else:
             self._cache.background(self._cache.decr(count_key))
-            self._cache.background(self._cache.srem(set_key, user_id))
+        self._set_social(social_key, f"l:{id}", liked)
 
     async def fav(self, id: int, user_id: int) -> None:
         count_key = f"{self.favs_count_prefix}:{id}"
-        set_key = f"{self.favs_prefix}:{id}"
-        if await self._db.gens.toggle_fav(id, user_id):
+        social_key = f"{self.social_prefix}:{user_id}"
+        faved = await self._db.gens.toggle_fav(id, user_id)
+        if faved:
             self._cache.background(self._cache.incr(count_key))
-            self._cache.background(self._cache.sadd_single(set_key, user_id))
         else:
             self._cache.background(self._cache.decr(count_key))
-            self._cache.background(self._cache.srem(set_key, user_id))
+        self._set_social(social_key, f"f:{id}", faved)
+
+    def _set_social(self, key: str, field: str, value: bool) -> None:
+        pipe = self._cache.pipeline()
+        pipe.hset(key, field, int(value))
+        pipe.expire(key, 600)
+        self._cache.background(pipe.execute())
+
+    # SITEMAP
+
+    async def get_sitemap(self, render: SitemapRender) -> dict:
+        """
+        {"stamp", "pages"} of the pre-rendered sitemap, rebuilt only after
+        reset_sitemap. render turns sitemap rows into rendered urls.
+        """
+        return await self._derived.get(
+            self.sitemap_key,
+            lambda db: self._build_sitemap(db, render),
+            SITEMAP_CACHE_TTL,
+            SITEMAP_CACHE_STALE,
+            lock_ttl=SITEMAP_BUILD_TIMEOUT,
+            wait_timeout=SITEMAP_BUILD_TIMEOUT,
+            replaced=self._expire_sitemap,
+        )
 
-    async def get_sitemap(self) -> List[dict]:
-        return await self._db.internal.get_sitemap()
+    async def _build_sitemap(self, db: PostgresDB, render: SitemapRender) -> dict:
+        """
+        One pass over a db cursor, urls are pushed as they come:
+        page n (SITEMAP_MAX_URLS urls) is a list at gens:sitemap:{stamp}:{n},
+        SITEMAP_CHUNK_SIZE urls per item.
+        """
+        stamp = create_random_string(8)
+        page, count = 0, 0
+        chunk: List[str] = []
+        async for url in render(db.internal.iter_sitemap()):
+            chunk.append(url)
+            count += 1
+            if len(chunk) == SITEMAP_CHUNK_SIZE or count == SITEMAP_MAX_URLS:
+                await self._push_sitemap_chunk(stamp, page, chunk)
+                chunk = []
+            if count == SITEMAP_MAX_URLS:
+                page, count = page + 1, 0
+
+        if len(chunk) > 0:
+            await self._push_sitemap_chunk(stamp, page, chunk)
+
+        pages = page + 1 if count > 0 or page == 0 else page
+        return {"stamp": stamp, "pages": pages}
+
+    async def _push_sitemap_chunk(
+        self, stamp: str, page: int, chunk: List[str]
+    ) -> None:
+        key = f"{self.sitemap_key}:{stamp}:{page}"
+        pipe = self._cache.pipeline()
+        pipe.rpush(key, "".join(chunk))
+        pipe.expire(key, SITEMAP_PAGES_TTL)
+        await pipe.execute()
+
+    async def _expire_sitemap(self, sitemap: dict) -> None:
+        pipe = self._cache.pipeline()
+        for page in range(sitemap["pages"]):
+            key = f"{self.sitemap_key}:{sitemap['stamp']}:{page}"
+            pipe.expire(key, SITEMAP_REPLACED_TTL)
+        await pipe.execute()
+
+    async def iter_sitemap_page(self, stamp: str, page: int) -> AsyncIterator[str]:
+        key = f"{self.sitemap_key}:{stamp}:{page}"
+        start = 0
+        while True:
+            chunks = await self._cache.lrange(
+                key, start, start + SITEMAP_READ_CHUNKS - 1
+            )
+            for chunk in chunks:
+                yield chunk
 
-    async def _reset_cache_many(self, p: SearchParams) -> None:
-        items, _ = await self._db.gens.search(
-            p,
-            page_size=999_999_999,
-            is_admin=True,
-        )
-        gen_ids = [item.get("id") for item in items]
+            if len(chunks) < SITEMAP_READ_CHUNKS:
+                return
 
-        tasks = []
-        for gen_id in gen_ids:
-            tasks.append(asyncio.create_task(self.reset_cache(gen_id)))  # type: ignore
+            start += SITEMAP_READ_CHUNKS
 
-        tasks.append(asyncio.create_task(self.reset_preview()))
-        await asyncio.gather(*tasks)
+    async def reset_sitemap(self) -> None:
+        await self._derived.reset(self.sitemap_key)
+
+    async def _reset_cache_many(self, ids: List[int]) -> None:
+        """
+        UNLINK in batches of RESET_BATCH_SIZE keys, all in one round trip
+        """
+        keys = [f"{self.prefix}:{id}" for id in ids]
+        if len(keys) > 0:
+            pipe = self._cache.pipeline()
+            for start in range(0, len(keys), RESET_BATCH_SIZE):
+                end = start + RESET_BATCH_SIZE
+                pipe.unlink(*keys[start:end])
+            await pipe.execute()
+
+        await self.reset_preview()
 
     async def rename_tag(self, old_name: str, new_name: str) -> bool:
         if not await self._db.gens.rename_tag(old_name, new_name):
             return False
 
-        p = SearchParams(t=[new_name])  # type: ignore
-        await self._reset_cache_many(p)
+        ids = await self._db.gens.get_ids_by_tag(new_name)
+        await self._reset_cache_many(ids)
         await self.reset_tags()
+        await self.reset_search()
         return True
 
     async def rename_subcategory(
@@ -444,10 +638,11 @@ class GensRepo:
         ):
             return False
 
-        p = SearchParams(  # type: ignore
-            c=category_name,
-            sc=[old_subcategory_name],
+        ids = await self._db.gens.get_ids_by_subcategory(
+            category_name,
+            new_subcategory_name,
         )
-        await self._reset_cache_many(p)
+        await self._reset_cache_many(ids)
         await self.reset_categories()
+        await self.reset_search()
         return True
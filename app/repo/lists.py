@@ -1,4 +1,4 @@
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 import orjson
 from fastapi_auth import User
@@ -32,6 +32,36 @@ class ListsRepo:
         row = orjson.loads(c_row)
         return ListEntity(**row)
 
+    async def get_many(self, ids: Iterable[int]) -> Dict[int, ListEntity]:
+        """
+        One MGET for all, one query for the misses.
+        Missing lists are not in the result.
+        """
+        ids = list(dict.fromkeys(ids))
+        if len(ids) == 0:
+            return {}
+
+        c_rows = await self._cache.mget([f"{self.prefix}:{id}" for id in ids])
+
+        entities = {}
+        missing = []
+        for id, c_row in zip(ids, c_rows):
+            if c_row is None:
+                missing.append(id)
+            else:
+                entities[id] = ListEntity(**orjson.loads(c_row))
+
+        if len(missing) > 0:
+            rows = await self._db.lists.get_many(missing)
+            if len(rows) > 0:
+                pipe = self._cache.pipeline()
+                for row in rows:
+                    pipe.set(f"{self.prefix}:{row['id']}", orjson.dumps(row), ex=600)
+                    entities[row["id"]] = ListEntity(**row)
+                self._cache.background(pipe.execute())
+
+        return entities
+
     async def reset_cache(self, id: int) -> None:
         await self._cache.delete(f"{self.prefix}:{id}")
 
@@ -49,7 +79,7 @@ class ListsRepo:
         search_params: SearchParams,
         limit: int,
         is_admin: bool,
-    ) -> Tuple[List[dict], int]:
+    ) -> Tuple[List[dict], Optional[int]]:
         return await self._db.lists.search(search_params, limit, is_admin)
 
     async def get_profile_for_owner(self, user_id: int) -> List[dict]:
@@ -1,5 +1,9 @@
+import asyncio
 import json
-from typing import List, Tuple, Type
+import time
+from typing import List, Optional, Tuple, Type
+
+import orjson
 
 from app.db.postgres import PostgresDB
 from app.db.redis import RedisCache
@@ -13,23 +17,102 @@ from app.entities.settings import (
 from app.models.settings import Action, ChangeSetting, Kind
 
 
+class _Snapshot:
+    """
+    What this worker knows about settings: perm values and temp flags
+    live in SettingsCol class attributes, this is when to recheck them.
+    """
+
+    __slots__ = ("version", "expires", "lock")
+
+    def __init__(self) -> None:
+        # version of perm values in redis, None - reload them
+        self.version: Optional[str] = None
+        self.expires = 0.0
+        self.lock = asyncio.Lock()
+
+
+_snapshot = _Snapshot()
+
+
 class SettingsRepo:
     temp_prefix: str = "settings:temp"
+    perm_key: str = "settings:perm"
+    version_key: str = "settings:version"
+    channel: str = "settings"
+    # how long a worker trusts its snapshot without asking redis,
+    # changes made on other workers come sooner through pub/sub
+    snapshot_ttl: float = 1.0
+
+    cols: List[Type[SettingsCol]] = [GensSetting, ListsSetting, GeneralSetting]
 
     def __init__(self, db: PostgresDB, cache: RedisCache) -> None:
         self._db = db
         self._cache = cache
 
     async def on_startup(self) -> None:
-        cols: List[Type[SettingsCol]] = [GensSetting, ListsSetting, GeneralSetting]
-        for col in cols:
+        perm = {}
+        for col in self.cols:
             for setting in col.perm():
                 value = await self._db.settings.get_setting(setting)
                 col.set_value(setting, value)
-            for setting in col.temp():
-                t_value, _ = await self.get_temp(setting)
-                if t_value:
-                    col.set_temp(setting, True)
+                perm[self._perm_field(setting)] = orjson.dumps(value)
+
+        # version starts at 0 so workers don't reload the hash on every
+        # refresh until the first change
+        pipe = self._cache.pipeline()
+        pipe.hset(self.perm_key, mapping=perm)
+        pipe.set(self.version_key, 0, nx=True)
+        await pipe.execute()
+        self.invalidate(reload=True)
+        await self.refresh()
+
+    @staticmethod
+    def invalidate(reload: bool = False) -> None:
+        """
+        Next read refreshes the snapshot,
+        reload - perm values too, even if the version is the same
+        """
+        _snapshot.expires = 0.0
+        if reload:
+            _snapshot.version = None
+
+    async def refresh(self) -> None:
+        """
+        One round trip at most every snapshot_ttl seconds:
+        perm values version and all temp flags.
+        Perm values hash is read only when the version has changed.
+        """
+        if time.monotonic() < _snapshot.expires:
+            return
+
+        async with _snapshot.lock:
+            if time.monotonic() < _snapshot.expires:
+                return
+
+            temp = [(col, setting) for col in self.cols for setting in col.temp()]
+            pipe = self._cache.pipeline()
+            pipe.get(self.version_key)
+            pipe.mget([self._temp_key(setting) for _, setting in temp])
+            version, values = await pipe.execute()
+
+            if version is None or version != _snapshot.version:
+                perm = await self._cache.hgetall(self.perm_key)
+                for col in self.cols:
+                    for setting in col.perm():
+                        value = perm.get(self._perm_field(setting))
+                        if value is not None:
+                            col.set_value(setting, orjson.loads(value))
+
+            for (col, setting), value in zip(temp, values):
+                # perm value may have been reloaded above
+                col.set_temp(getattr(col, setting.name), value is not None)
+
+            _snapshot.version = version
+            _snapshot.expires = time.monotonic() + self.snapshot_ttl
+
+    def _perm_field(self, setting: Setting) -> str:
+        return f"{setting.section}:{setting.name}"
 
     def _temp_key(self, setting: Setting) -> str:
         return f"{self.temp_prefix}:{setting.section}:{setting.name}"
@@ -50,10 +133,20 @@ class SettingsRepo:
         if isinstance(value, bool):
             value = 1
         await self._cache.set(key, value, ex)
+        await self._changed(setting)
 
     async def delete_temp(self, setting: Setting) -> None:
         key = self._temp_key(setting)
         await self._cache.delete(key)
+        await self._changed(setting)
+
+    async def is_temp(self, setting: Setting) -> bool:
+        """
+        Same as get_temp without ttl, from the snapshot
+        """
+        await self.refresh()
+        col = self._get_col(setting)
+        return getattr(col, setting.name).temp
 
     def _get_col(self, setting: Setting) -> Type[SettingsCol]:
         match setting.section:
@@ -67,16 +160,13 @@ class SettingsRepo:
                 raise Exception("Wrong setting section", setting.section)
 
     async def get(self, setting: Setting) -> int | str | bool:
+        await self.refresh()
         col = self._get_col(setting)
         s = getattr(col, setting.name)
         if s.temp:
-            t_value, ttl = await self.get_temp(setting)
-            if t_value:
-                return t_value
-            else:
-                col.set_temp(setting, False)
+            return True
 
-        return setting.value
+        return s.value
 
     async def get_perm_int(self, setting: Setting) -> int:
         return await self.get(setting)  # type: ignore
@@ -89,8 +179,21 @@ class SettingsRepo:
 
     async def set(self, setting: Setting, value: int | str | bool) -> None:
         await self._db.settings.set_setting(setting, value)
-        col = self._get_col(setting)
-        col.set_value(setting, value)
+        pipe = self._cache.pipeline()
+        pipe.hset(self.perm_key, self._perm_field(setting), orjson.dumps(value))
+        pipe.incr(self.version_key)
+        await pipe.execute()
+        await self._changed(setting, reload=True)
+
+    async def _changed(self, setting: Setting, reload: bool = False) -> None:
+        """
+        Refreshes this worker's snapshot and tells the others to
+        """
+        self.invalidate(reload)
+        await self.pub(
+            self.channel,
+            {"section": setting.section, "name": setting.name},
+        )
 
     async def perm_to_dict(self, settings: Type[SettingsCol]) -> dict:
         d = {}
@@ -1,5 +1,4 @@
 import asyncio
-import json
 
 from aioredis import Redis
 from asyncpg import Connection, Pool
@@ -10,6 +9,7 @@ from fastapi_auth.repo import Repo as AuthRepo
 
 from app.config import DOMAIN, LANGUAGE, ORIGIN
 from app.db.postgres import PostgresDB
+from app.db.postgres.lazy import LazyConnection
 from app.db.redis import RedisCache
 from app.logger import Logger
 from app.repo.events import EventsRepo
@@ -38,37 +38,53 @@ def _get_cache_pool(request: Request) -> Redis:
 
 
 async def _get_connection_from_db_pool(pool: Pool = Depends(_get_db_pool)):
-    async with pool.acquire() as connection:
-        await connection.set_type_codec(
-            "jsonb",
-            encoder=json.dumps,
-            decoder=json.loads,
-            schema="pg_catalog",
-        )
+    """
+    One per request (FastAPI caches dependencies within a request),
+    so every repo of a request shares it.
+    Pool connection is checked out on the first query only.
+    jsonb codec is set once per connection by the pool, see db.postgres.pool
+    """
+    connection = LazyConnection(pool)
+    try:
         yield connection
+    finally:
+        await connection.release()
+
+
+async def _get_acquired_connection(
+    connection: LazyConnection = Depends(_get_connection_from_db_pool),
+) -> Connection:
+    """
+    The request's pool connection itself, checked out now, for clients
+    that need the whole asyncpg Connection api (fastapi_auth).
+    Released with the LazyConnection.
+    """
+    return await connection.acquire()
 
 
 async def _get_connection_from_cache_pool(pool: Redis = Depends(_get_cache_pool)):
-    async with pool.client() as connection:
-        yield connection
+    # pool client takes a connection per command, nothing to check out
+    yield pool
 
 
 def get_repo(
     repo_type,
 ):
     async def _get_repo(
-        db_connection: Connection = Depends(_get_connection_from_db_pool),
+        db_connection: LazyConnection = Depends(_get_connection_from_db_pool),
         cache_connection: Redis = Depends(_get_connection_from_cache_pool),
     ):
         pg = PostgresDB(db_connection)
         redis = RedisCache(cache_connection)
         repo = repo_type(pg, redis)
         yield repo
+        # background writes are on the app queue, see db.background,
+        # only the ones it couldn't take are awaited here
         coros = []
         if hasattr(repo, "background_tasks") and len(repo.background_tasks) > 0:
             coros.extend(repo.background_tasks)
-        if len(pg.background_tasks) > 0:
-            coros.extend(pg.background_tasks)
+        # deferred db jobs run one by one on the request's connection
+        coros.append(pg.run_deferred())
         if len(redis.background_tasks) > 0:
             coros.extend(redis.background_tasks)
 
@@ -112,7 +128,7 @@ def get_events_repo(repo=Depends(_get_events_repo), logger=Depends(get_logger)):
 
 def get_fastapi_auth_repo(
     request: Request,
-    db_connection=Depends(_get_connection_from_db_pool),
+    db_connection: Connection = Depends(_get_acquired_connection),
     cache_connection=Depends(_get_connection_from_cache_pool),
 ) -> AuthRepo:
     tp = request.app.state._fastapi_auth._token_params
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 
+from app.db.ratelimit import RateLimitStatus
 from app.entities.events import Event
 from app.entities.settings import GeneralSetting
 from app.general.resolver import resolve_generation
@@ -53,17 +54,17 @@ async def general_result(
 
     ip = request.client.host
 
-    if await repo.in_ratelimit_ban(ip):
-        raise HTTPException(429, detail="Too many requests")
-
     ratelimit = await settings_repo.get_perm_int(GeneralSetting.RESULT_RATELIMIT)
 
-    if await repo.ratelimit_exceeded(ip, ratelimit):
+    status = await repo.ratelimit(ip, ratelimit)
+    if status == RateLimitStatus.EXCEEDED:
         log = {
             "ip": ip,
             "name": name_,
         }
         logger.event(Event.GENERAL_RESULT_RATELIMIT, log)
+
+    if status != RateLimitStatus.OK:
         raise HTTPException(429, detail="Too many requests")
 
     # response is just a string
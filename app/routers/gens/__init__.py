@@ -45,9 +45,11 @@ POST   /{id}/key - editor
 GET    /{id}/social - view
 POST   /{id}/like - view
 POST   /{id}/fav - view
+POST   /{id}/batch - view
 
 
 GET    /{id}/{secret} - view
 POST   /{id}/{secret} - view
+POST   /{id}/{secret}/batch - view
 
 """
@@ -62,9 +62,9 @@ async def gens_create_new(
         GensSetting.EDITOR_SPAM_BAN_DURATION,
     )
 
-    (t_save_ban_create, _), (t_captcha_create, _) = await asyncio.gather(
-        settings_repo.get_temp(GensSetting.EDITOR_SAVE_BAN_CREATE),  # type: ignore
-        settings_repo.get_temp(GensSetting.EDITOR_CAPTCHA_CREATE),  # type: ignore
+    t_save_ban_create, t_captcha_create = await asyncio.gather(
+        settings_repo.is_temp(GensSetting.EDITOR_SAVE_BAN_CREATE),  # type: ignore
+        settings_repo.is_temp(GensSetting.EDITOR_CAPTCHA_CREATE),  # type: ignore
     )
 
     data = await request.json()
@@ -160,9 +160,9 @@ async def gens_edit_new(
     p_captcha_edit = await settings_repo.get_perm_bool(
         GensSetting.EDITOR_CAPTCHA_EDIT  # type: ignore
     )
-    (t_save_edit_ban, _), (t_capctcha_edit, _) = await asyncio.gather(
-        settings_repo.get_temp(GensSetting.EDITOR_SAVE_BAN_EDIT),  # type: ignore
-        settings_repo.get_temp(GensSetting.EDITOR_CAPTCHA_EDIT),  # type: ignore
+    t_save_edit_ban, t_capctcha_edit = await asyncio.gather(
+        settings_repo.is_temp(GensSetting.EDITOR_SAVE_BAN_EDIT),  # type: ignore
+        settings_repo.is_temp(GensSetting.EDITOR_CAPTCHA_EDIT),  # type: ignore
     )
 
     data = await request.json()
@@ -221,10 +221,10 @@ async def gens_new_session(
     p_save_ban_edit = await settings_repo.get_perm_bool(
         GensSetting.EDITOR_SAVE_BAN_EDIT,
     )
-    t_save_ban_create, _ = await settings_repo.get_temp(
+    t_save_ban_create = await settings_repo.is_temp(
         GensSetting.EDITOR_SAVE_BAN_CREATE,
     )
-    t_save_ban_edit, _ = await settings_repo.get_temp(
+    t_save_ban_edit = await settings_repo.is_temp(
         GensSetting.EDITOR_SAVE_BAN_EDIT,
     )
 
@@ -284,15 +284,15 @@ async def gens_status(
         GensSetting.EDITOR_PING_INTERVAL  # type: ignore
     )
     (
-        (t_save_ban_create, _),
-        (t_save_ban_edit, _),
-        (t_captcha_create, _),
-        (t_captcha_edit, _),
+        t_save_ban_create,
+        t_save_ban_edit,
+        t_captcha_create,
+        t_captcha_edit,
     ) = await asyncio.gather(
-        settings_repo.get_temp(GensSetting.EDITOR_SAVE_BAN_CREATE),  # type: ignore
-        settings_repo.get_temp(GensSetting.EDITOR_SAVE_BAN_EDIT),  # type: ignore
-        settings_repo.get_temp(GensSetting.EDITOR_CAPTCHA_CREATE),  # type: ignore
-        settings_repo.get_temp(GensSetting.EDITOR_CAPTCHA_EDIT),  # type: ignore
+        settings_repo.is_temp(GensSetting.EDITOR_SAVE_BAN_CREATE),  # type: ignore
+        settings_repo.is_temp(GensSetting.EDITOR_SAVE_BAN_EDIT),  # type: ignore
+        settings_repo.is_temp(GensSetting.EDITOR_CAPTCHA_CREATE),  # type: ignore
+        settings_repo.is_temp(GensSetting.EDITOR_CAPTCHA_EDIT),  # type: ignore
     )
 
     save_ban_create = p_save_ban_create or t_save_ban_create
@@ -1,19 +1,28 @@
 import random
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import ORJSONResponse
 from fastapi_auth import User, get_user
 
 from app.entities.events import Event
 from app.entities.settings import GensSetting
-from app.models.gens import Category, Preview, Search, SearchParams, Suggestion, Tag
+from app.models.gens import (
+    Category,
+    Preview,
+    Search,
+    SearchParams,
+    SearchSort,
+    Suggestion,
+    Tag,
+)
 from app.repo.events import EventsRepo
 from app.repo.gens import GensRepo
 from app.repo.settings import SettingsRepo
 from app.routers.dependencies import get_events_repo
 from app.routers.dependencies import get_gens_repo as get_repo
 from app.routers.dependencies import get_settings_repo
+from app.utils.cursor import next_cursor
 
 router = APIRouter()
 
@@ -35,6 +44,7 @@ async def gens_search(
     q: Optional[str] = None,
     f: Optional[str] = None,
     p: Optional[int] = 1,
+    after: Optional[str] = None,
 ):
     # TODO: try catch
     # BUG: value not in sort values somehow???
@@ -45,35 +55,52 @@ async def gens_search(
         q=q,
         f=f,
         p=p,
+        after=after,
     )
 
     log = sp.dict(exclude_none=True)
 
     page_size = await settings_repo.get_perm_int(GensSetting.SEARCH_PAGE_SIZE)
 
-    items, count = await repo.search_and_count(
-        sp,
-        page_size,
-        user is not None and user.is_admin(),
-    )
+    try:
+        items, count = await repo.search_and_count(
+            sp,
+            page_size,
+            user is not None and user.is_admin(),
+        )
+    except ValueError:
+        raise HTTPException(400, detail="invalid cursor")
     log.update({"count": count})  # type: ignore
 
-    div = count // page_size
-    pages = div if count % page_size == 0 else div + 1
-
-    if sp.p == 1 and (
-        sp.category is not None
-        or sp.subcategories is not None
-        or sp.tags is not None
-        or sp.title is not None
+    if count is not None:
+        div = count // page_size
+        pages = div if count % page_size == 0 else div + 1
+    else:
+        pages = None
+
+    if (
+        sp.p == 1
+        and sp.after is None
+        and (
+            sp.category is not None
+            or sp.subcategories is not None
+            or sp.tags is not None
+            or sp.title is not None
+        )
     ):
         await events_repo.create(Event.GENS_SEARCH, log)
 
+    # views change on every flush, offset pages only
+    next = None
+    if sp.sort != SearchSort.VIEWS:
+        next = next_cursor(items, page_size, sp.sort.value)  # type: ignore
+
     return ORJSONResponse(
         Search(
             items=items,
             pages=pages,
             current_page=sp.p,
+            next=next,
         ).dict(by_alias=True)
     )
 
@@ -1,20 +1,35 @@
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 from fastapi.responses import ORJSONResponse
 from fastapi_auth import User, get_authenticated_user, get_user
 
 from app.logger import Logger
-from app.models.gens import Result
+from app.models.gens import Result, Results
 from app.repo.gens import GensRepo
 from app.repo.lists import ListsRepo
 from app.repo.settings import SettingsRepo
 from app.routers.dependencies import get_gens_repo as get_repo
 from app.routers.dependencies import get_lists_repo, get_logger, get_settings_repo
-from app.services.gens import fav, get_info, get_result, like
+from app.services.gens import (
+    BATCH_RESULTS_PER_HIT,
+    fav,
+    get_info,
+    get_result,
+    get_results,
+    like,
+)
 
 router = APIRouter()
 
+# hard cap, VIEW_RESULT_RATELIMIT is checked in service
+MAX_RESULTS = 100
+BATCH_DESCRIPTION = (
+    f"Up to {MAX_RESULTS} results in one request. Counts as one request "
+    f"per {BATCH_RESULTS_PER_HIT} results (rounded up) against "
+    "VIEW_RESULT_RATELIMIT, 400 if that alone is over the limit."
+)
+
 
 @router.get(
     "/{id}",
@@ -75,6 +90,35 @@ async def gens_fav(
     await fav(repo, user, id)
 
 
+@router.post(
+    "/{id}/batch",
+    name="gens:get_results",
+    response_model=Results,
+    description=BATCH_DESCRIPTION,
+)
+async def gens_results(
+    *,
+    id: int,
+    n: int = Query(1, ge=1, le=MAX_RESULTS),
+    gens_repo: GensRepo = Depends(get_repo),
+    lists_repo: ListsRepo = Depends(get_lists_repo),
+    settings_repo: SettingsRepo = Depends(get_settings_repo),
+    user: Optional[User] = Depends(get_user),
+    logger: Logger = Depends(get_logger),
+    request: Request,
+):
+    return await get_results(
+        logger,
+        gens_repo,
+        lists_repo,
+        settings_repo,
+        user,
+        id,
+        request.client.host,
+        n,
+    )
+
+
 @router.get(
     "/{id}/{secret}",
     name="gens:get_info_secret",
@@ -117,3 +161,34 @@ async def gens_result_secret(
         request.client.host,
         secret,
     )
+
+
+@router.post(
+    "/{id}/{secret}/batch",
+    name="gens:get_results_secret",
+    response_model=Results,
+    description=BATCH_DESCRIPTION,
+)
+async def gens_results_secret(
+    *,
+    id: int,
+    secret: str,
+    n: int = Query(1, ge=1, le=MAX_RESULTS),
+    gens_repo: GensRepo = Depends(get_repo),
+    lists_repo: ListsRepo = Depends(get_lists_repo),
+    settings_repo: SettingsRepo = Depends(get_settings_repo),
+    user: Optional[User] = Depends(get_user),
+    logger: Logger = Depends(get_logger),
+    request: Request,
+):
+    return await get_results(
+        logger,
+        gens_repo,
+        lists_repo,
+        settings_repo,
+        user,
+        id,
+        request.client.host,
+        n,
+        secret,
+    )
@@ -37,9 +37,9 @@ async def lists_create(
         ListsSetting.EDITOR_CAPTCHA_CREATE  # type: ignore
     )
 
-    (t_save_create_ban, _), (t_captcha_create, _) = await asyncio.gather(
-        settings_repo.get_temp(ListsSetting.EDITOR_SAVE_BAN_CREATE),  # type: ignore
-        settings_repo.get_temp(ListsSetting.EDITOR_CAPTCHA_CREATE),  # type: ignore
+    t_save_create_ban, t_captcha_create = await asyncio.gather(
+        settings_repo.is_temp(ListsSetting.EDITOR_SAVE_BAN_CREATE),  # type: ignore
+        settings_repo.is_temp(ListsSetting.EDITOR_CAPTCHA_CREATE),  # type: ignore
     )
 
     if p_save_ban_create or t_save_create_ban:
@@ -106,9 +106,9 @@ async def lists_edit(
         ListsSetting.EDITOR_CAPTCHA_EDIT  # type: ignore
     )
 
-    (t_save_ban_edit, _), (t_capctcha_edit, _) = await asyncio.gather(
-        settings_repo.get_temp(ListsSetting.EDITOR_SAVE_BAN_EDIT),  # type: ignore
-        settings_repo.get_temp(ListsSetting.EDITOR_CAPTCHA_EDIT),  # type: ignore
+    t_save_ban_edit, t_capctcha_edit = await asyncio.gather(
+        settings_repo.is_temp(ListsSetting.EDITOR_SAVE_BAN_EDIT),  # type: ignore
+        settings_repo.is_temp(ListsSetting.EDITOR_CAPTCHA_EDIT),  # type: ignore
     )
 
     if p_save_ban_edit or t_save_ban_edit:
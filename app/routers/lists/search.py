@@ -21,6 +21,7 @@ async def lists_search(
     user: User = Depends(get_user),
     q: Optional[str] = None,
     p: Optional[str] = "1",
+    after: Optional[str] = None,
 ):
-    search_params = SearchParams(q=q, p=p)
+    search_params = SearchParams(q=q, p=p, after=after)
     return await search(repo, settings_repo, user, search_params)
@@ -3,6 +3,7 @@ from typing import List, Type
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi_auth import admin_required
 
+from app.db.background import background_queue
 from app.entities.settings import GeneralSetting, GensSetting, ListsSetting, SettingsCol
 from app.models.settings import ChangeSetting
 from app.repo.settings import SettingsRepo
@@ -59,3 +60,11 @@ async def gens_change_setting(
 
     if not await repo.change_setting(setting, data_in):
         raise HTTPException(400, detail="Error while changing setting")
+
+
+@router.get(
+    "/background",
+    name="gens:get_background_metrics",
+)
+async def gens_get_background_metrics():
+    return background_queue.metrics()
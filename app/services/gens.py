@@ -1,10 +1,12 @@
+import math
 from typing import Callable, Optional
 
 from fastapi import HTTPException
 from fastapi_auth import User
 
 from app.core.engine.hornet import HornetEngine
-from app.core.response import GenerateResponse
+from app.core.response import GenerateManyResponse, GenerateResponse
+from app.db.ratelimit import RateLimitStatus
 from app.entities.events import Event
 from app.entities.settings import GensSetting
 from app.logger import Logger
@@ -13,6 +15,10 @@ from app.repo.gens import GensRepo
 from app.repo.lists import ListsRepo
 from app.repo.settings import SettingsRepo
 
+# a batch counts as one request per this many results (rounded up),
+# so n=100 costs 4 of VIEW_RESULT_RATELIMIT
+BATCH_RESULTS_PER_HIT = 25
+
 
 def _aproximate_variations(vars: Optional[int]) -> str:  # pragma: no cover
     if not vars:
@@ -74,8 +80,7 @@ async def get_info(
     a_variations = _aproximate_variations(entity.variations)  # type: ignore
 
     if user is not None:
-        liked = user.id in entity.likes
-        faved = user.id in entity.favs
+        liked, faved = await repo.get_liked_and_faved(id, user.id)  # type: ignore
     else:
         liked = False
         faved = False
@@ -94,7 +99,7 @@ async def get_info(
     return PublicInfo(**data).dict(by_alias=True)
 
 
-async def get_result(
+async def _get_engine(
     logger: Logger,
     gens_repo: GensRepo,
     lists_repo: ListsRepo,
@@ -102,20 +107,27 @@ async def get_result(
     user: Optional[User],
     id: int,
     ip: str,
-    secret: Optional[str] = None,
-) -> GenerateResponse:
-    if await gens_repo.in_ratelimit_ban(ip):
-        raise HTTPException(429, detail="too many requests")
-
+    secret: Optional[str],
+    n: int,
+) -> HornetEngine:
     ratelimit = await settings_repo.get_perm_int(
         GensSetting.VIEW_RESULT_RATELIMIT,  # type: ignore
     )
-    if await gens_repo.ratelimit_exceeded(ip, ratelimit):
+    cost = math.ceil(n / BATCH_RESULTS_PER_HIT)
+    if cost > ratelimit:
+        raise HTTPException(400, detail="too many results")
+
+    status = await gens_repo.ratelimit(ip, ratelimit, cost)
+    if status == RateLimitStatus.EXCEEDED:
         log = {
             "ip": ip,
             "id": id,
         }
+        if n > 1:
+            log.update({"n": n})  # type: ignore
         logger.gens.event(Event.GENS_RESULT_RATELIMIT, log)
+
+    if status != RateLimitStatus.OK:
         raise HTTPException(429, detail="too many requests")
 
     entity = await gens_repo.get(id)
@@ -124,7 +136,7 @@ async def get_result(
 
     entity.check_view_permissions(user, secret)
 
-    engine = HornetEngine(
+    return HornetEngine(
         entity.dict(),
         gens_repo,
         lists_repo,
@@ -133,9 +145,56 @@ async def get_result(
         entity,
     )
 
+
+async def get_result(
+    logger: Logger,
+    gens_repo: GensRepo,
+    lists_repo: ListsRepo,
+    settings_repo: SettingsRepo,
+    user: Optional[User],
+    id: int,
+    ip: str,
+    secret: Optional[str] = None,
+) -> GenerateResponse:
+    engine = await _get_engine(
+        logger,
+        gens_repo,
+        lists_repo,
+        settings_repo,
+        user,
+        id,
+        ip,
+        secret,
+        1,
+    )
     return await engine.generate()
 
 
+async def get_results(
+    logger: Logger,
+    gens_repo: GensRepo,
+    lists_repo: ListsRepo,
+    settings_repo: SettingsRepo,
+    user: Optional[User],
+    id: int,
+    ip: str,
+    n: int,
+    secret: Optional[str] = None,
+) -> GenerateManyResponse:
+    engine = await _get_engine(
+        logger,
+        gens_repo,
+        lists_repo,
+        settings_repo,
+        user,
+        id,
+        ip,
+        secret,
+        n,
+    )
+    return await engine.generate_many(n)
+
+
 async def _social_action(
     repo: GensRepo,
     id: int,
@@ -8,6 +8,7 @@ from app.entities.lists import ListEntity
 from app.models.lists import SearchParams
 from app.repo.lists import ListsRepo
 from app.repo.settings import SettingsRepo
+from app.utils.cursor import next_cursor
 
 from ..entities.settings import ListsSetting
 
@@ -19,19 +20,26 @@ async def search(
     search_params: SearchParams,
 ) -> dict:
     page_size = await settings_repo.get_perm_int(ListsSetting.SEARCH_PAGE_SIZE)
-    items, count = await repo.search_and_count(
-        search_params,
-        page_size,
-        user is not None and user.is_admin(),
-    )
-
-    div = count // page_size
-    pages = div if count % page_size == 0 else div + 1
+    try:
+        items, count = await repo.search_and_count(
+            search_params,
+            page_size,
+            user is not None and user.is_admin(),
+        )
+    except ValueError:
+        raise HTTPException(400, detail="invalid cursor")
+
+    if count is not None:
+        div = count // page_size
+        pages = div if count % page_size == 0 else div + 1
+    else:
+        pages = None
 
     return {
         "items": items,
         "pages": pages,
         "current_page": search_params.p,
+        "next": next_cursor(items, page_size, "id"),
     }
 
 
@@ -59,16 +67,16 @@ async def get_status(settings_repo: SettingsRepo) -> dict:
     p_captcha_edit = await settings_repo.get_perm_bool(
         ListsSetting.EDITOR_CAPTCHA_EDIT  # type: ignore
     )
-    (t_save_ban_create, _) = await settings_repo.get_temp(
+    t_save_ban_create = await settings_repo.is_temp(
         ListsSetting.EDITOR_SAVE_BAN_CREATE  # type: ignore
     )
-    (t_captcha_create, _) = await settings_repo.get_temp(
+    t_captcha_create = await settings_repo.is_temp(
         ListsSetting.EDITOR_CAPTCHA_CREATE  # type: ignore
     )
-    (t_save_ban_edit, _) = await settings_repo.get_temp(
+    t_save_ban_edit = await settings_repo.is_temp(
         ListsSetting.EDITOR_SAVE_BAN_EDIT  # type: ignore
     )
-    (t_captcha_edit, _) = await settings_repo.get_temp(
+    t_captcha_edit = await settings_repo.is_temp(
         ListsSetting.EDITOR_CAPTCHA_EDIT,  # type: ignore
     )
 
@@ -0,0 +1,115 @@
+from typing import AsyncIterator, List
+from xml.sax.saxutils import escape
+
+from app.config import LANGUAGE
+from app.entities.gens import GeneratorSitemapRow
+from app.repo.gens import GensRepo
+
+XML_HEAD = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_HEAD = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+URLSET_TAIL = "</urlset>"
+INDEX_HEAD = '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+INDEX_TAIL = "</sitemapindex>"
+
+CREATIVE_URLS = [
+    "fantasy_name",
+    "appearance",
+    "crowd",
+    "character",
+    "motivation",
+    "abilities",
+    "features",
+    "jobs",
+    "race",
+    "superpowers",
+    "plot",
+    "plotkeys",
+    "awkward_moment",
+    "unexpected_event",
+    "bookname",
+    "fantasy_continent",
+    "fantasy_country",
+    "fantasy_town",
+    "country_description",
+]
+GENERAL_URLS = [
+    "numbers",
+    "names",
+    "surnames",
+    "date",
+    "time",
+    "countries",
+    "cities",
+    "cubes",
+    "coin",
+]
+
+
+def _origin() -> str:
+    if LANGUAGE == "RU":
+        return "https://randomall.ru"
+
+    return "https://creativeton.com"
+
+
+def _static_urls() -> List[dict]:
+    origin = _origin()
+    main = [{"loc": origin, "changefreq": "weekly", "priority": "1.0"}]
+    if LANGUAGE != "RU":
+        return main
+
+    creative = [
+        {"loc": f"{origin}/{url}", "changefreq": "weekly", "priority": "0.9"}
+        for url in CREATIVE_URLS
+    ]
+    general = [
+        {"loc": f"{origin}/{url}", "changefreq": "weekly", "priority": "0.7"}
+        for url in GENERAL_URLS
+    ]
+    return main + creative + general
+
+
+def _gen_url(row: GeneratorSitemapRow) -> dict:
+    if LANGUAGE == "RU":
+        loc = f"{_origin()}/custom/gen/{row.get('id')}"
+    else:
+        loc = f"{_origin()}/gens/{row.get('id')}"
+
+    return {
+        "loc": loc,
+        "lastmod": row.get("date_updated").strftime("%Y-%m-%d"),
+        "changefreq": "weekly",
+        "priority": "0.9",
+    }
+
+
+def _render_url(url: dict) -> str:
+    fields = "".join(f"<{key}>{escape(value)}</{key}>" for key, value in url.items())
+    return f"<url>{fields}</url>"
+
+
+async def render_urls(rows: AsyncIterator[GeneratorSitemapRow]) -> AsyncIterator[str]:
+    """Static pages, then public gens, one rendered <url> each"""
+    for url in _static_urls():
+        yield _render_url(url)
+
+    async for row in rows:
+        yield _render_url(_gen_url(row))
+
+
+def render_index(pages: int) -> str:
+    origin = _origin()
+    sitemaps = "".join(
+        f"<sitemap><loc>{origin}/sitemap-{page}.xml</loc></sitemap>"
+        for page in range(pages)
+    )
+    return f"{XML_HEAD}{INDEX_HEAD}{sitemaps}{INDEX_TAIL}"
+
+
+async def stream_urlset(repo: GensRepo, stamp: str, page: int) -> AsyncIterator[str]:
+    yield XML_HEAD
+    yield URLSET_HEAD
+    async for chunk in repo.iter_sitemap_page(stamp, page):
+        yield chunk
+
+    yield URLSET_TAIL
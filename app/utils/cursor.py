@@ -0,0 +1,40 @@
+import base64
+import binascii
+from typing import Any, List, Optional, Tuple
+
+import orjson
+
+
+def encode_cursor(key: Any, id: int) -> str:
+    """
+    Opaque keyset cursor: (sort key, id) of the last item on the page
+    """
+    data = orjson.dumps([key, id])
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """
+    Raises ValueError if cursor is malformed
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key, id = orjson.loads(data)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+        raise ValueError("invalid cursor")
+
+    if not isinstance(id, int):
+        raise ValueError("invalid cursor")
+
+    return key, id
+
+
+def next_cursor(items: List[dict], page_size: int, key: str) -> Optional[str]:
+    """
+    Cursor after the last item, None if it's the last page
+    """
+    if len(items) < page_size or len(items) == 0:
+        return None
+
+    last = items[-1]
+    return encode_cursor(last.get(key), last.get("id"))  # type: ignore
@@ -0,0 +1,67 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class LRUCache(Generic[V]):
+    """
+    Bounded in-process cache, one per worker.
+    Entries older than ttl seconds are treated as missing.
+    With weigh, maxsize bounds the total weight of entries, not their number
+    (an entry heavier than maxsize is not kept at all).
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        weigh: Optional[Callable[[V], int]] = None,
+    ) -> None:
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._weigh = weigh
+        self._size = 0
+        self._items: OrderedDict[Hashable, Tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: Hashable) -> Optional[V]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self.delete(key)
+            return None
+
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        if self._ttl is None:
+            expires_at = float("inf")
+        else:
+            expires_at = time.monotonic() + self._ttl
+
+        self.delete(key)
+        self._items[key] = (expires_at, value)
+        self._size += self._sizeof(value)
+        while self._size > self._maxsize:
+            _, (_, evicted) = self._items.popitem(last=False)
+            self._size -= self._sizeof(evicted)
+
+    def delete(self, key: Hashable) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._size -= self._sizeof(item[1])
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._size = 0
+
+    def _sizeof(self, value: V) -> int:
+        return 1 if self._weigh is None else self._weigh(value)
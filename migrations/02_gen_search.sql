@@ -0,0 +1,107 @@
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- denormalized gen row for search, kept current by GensExt
+CREATE TABLE IF NOT EXISTS gen_search (
+  gen_id INTEGER PRIMARY KEY REFERENCES gen(id) ON DELETE CASCADE,
+  title TEXT,
+  category TEXT,
+  subcategories TEXT[] NOT NULL DEFAULT ARRAY[]::text[],
+  tags TEXT[] NOT NULL DEFAULT ARRAY[]::text[],
+  generator TEXT,
+  features TEXT[] NOT NULL DEFAULT ARRAY[]::text[],
+  access INTEGER,
+  active BOOLEAN,
+  likes_count INTEGER NOT NULL DEFAULT 0,
+  favs_count INTEGER NOT NULL DEFAULT 0,
+  date_added TIMESTAMP WITH TIME ZONE,
+  date_updated TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS gen_search_title_trgm_idx ON gen_search USING GIN (title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS gen_search_subcategories_idx ON gen_search USING GIN (subcategories);
+CREATE INDEX IF NOT EXISTS gen_search_tags_idx ON gen_search USING GIN (tags);
+CREATE INDEX IF NOT EXISTS gen_search_category_idx ON gen_search(category);
+CREATE INDEX IF NOT EXISTS gen_search_access_active_date_updated_idx ON gen_search(access, active, date_updated DESC);
+CREATE INDEX IF NOT EXISTS gen_search_access_active_date_added_idx ON gen_search(access, active, date_added DESC);
+CREATE INDEX IF NOT EXISTS gen_search_access_active_likes_count_idx ON gen_search(access, active, likes_count DESC);
+
+CREATE OR REPLACE FUNCTION gen_search_refresh(gen_id INTEGER) RETURNS VOID AS $$
+  INSERT INTO gen_search (
+    gen_id,
+    title,
+    category,
+    subcategories,
+    tags,
+    generator,
+    features,
+    access,
+    active,
+    likes_count,
+    favs_count,
+    date_added,
+    date_updated
+  )
+  SELECT
+    g.id,
+    g.title,
+    c.name,
+    (
+      SELECT
+        COALESCE(array_agg(s.name), ARRAY[]::text[])
+      FROM
+        gen_subcategory gs
+      JOIN subcategory s
+        ON s.id = gs.subcategory_id
+      WHERE
+        gs.gen_id = g.id
+    ),
+    (
+      SELECT
+        COALESCE(array_agg(t.name), ARRAY[]::text[])
+      FROM
+        gen_tag gt
+      JOIN tag t
+        ON t.id = gt.tag_id
+      WHERE
+        gt.gen_id = g.id
+    ),
+    (
+      SELECT eg.name FROM generator eg WHERE eg.id = g.generator_id
+    ),
+    (
+      SELECT
+        COALESCE(array_agg(DISTINCT egf.name), ARRAY[]::text[])
+      FROM feature egf
+      JOIN generator eg
+        ON eg.id = egf.generator_id
+      JOIN gen_feature gegf
+        ON gegf.gen_id = g.id
+    ),
+    g.access,
+    g.active,
+    (SELECT count(*) FROM gen_like gl WHERE gl.gen_id = g.id),
+    (SELECT count(*) FROM gen_fav gf WHERE gf.gen_id = g.id),
+    g.date_added,
+    g.date_updated
+  FROM
+    gen g
+  LEFT JOIN category c
+    ON c.id = g.category_id
+  WHERE
+    g.id = gen_search_refresh.gen_id
+    AND EXISTS (SELECT 1 FROM gen_feature gegf WHERE gegf.gen_id = g.id)
+  ON CONFLICT (gen_id) DO UPDATE SET
+    title = EXCLUDED.title,
+    category = EXCLUDED.category,
+    subcategories = EXCLUDED.subcategories,
+    tags = EXCLUDED.tags,
+    generator = EXCLUDED.generator,
+    features = EXCLUDED.features,
+    access = EXCLUDED.access,
+    active = EXCLUDED.active,
+    likes_count = EXCLUDED.likes_count,
+    favs_count = EXCLUDED.favs_count,
+    date_added = EXCLUDED.date_added,
+    date_updated = EXCLUDED.date_updated;
+$$ LANGUAGE SQL;
+
+SELECT gen_search_refresh(id) FROM gen;
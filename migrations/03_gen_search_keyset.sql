@@ -0,0 +1,7 @@
+-- keyset pagination orders by (sort key, gen_id)
+DROP INDEX IF EXISTS gen_search_access_active_date_updated_idx;
+DROP INDEX IF EXISTS gen_search_access_active_date_added_idx;
+DROP INDEX IF EXISTS gen_search_access_active_likes_count_idx;
+CREATE INDEX IF NOT EXISTS gen_search_access_active_date_updated_gen_id_idx ON gen_search(access, active, date_updated DESC, gen_id DESC);
+CREATE INDEX IF NOT EXISTS gen_search_access_active_date_added_gen_id_idx ON gen_search(access, active, date_added DESC, gen_id DESC);
+CREATE INDEX IF NOT EXISTS gen_search_access_active_likes_count_gen_id_idx ON gen_search(access, active, likes_count DESC, gen_id DESC);
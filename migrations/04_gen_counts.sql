@@ -0,0 +1,78 @@
+-- gens per category, subcategory and tag, kept current by GensExt
+ALTER TABLE category ADD COLUMN IF NOT EXISTS gens_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE subcategory ADD COLUMN IF NOT EXISTS gens_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE tag ADD COLUMN IF NOT EXISTS gens_count INTEGER NOT NULL DEFAULT 0;
+
+-- recounts from scratch, returns number of rows that were off
+CREATE OR REPLACE FUNCTION gen_counts_reconcile() RETURNS INTEGER AS $$
+  WITH fixed_categories AS (
+    UPDATE category c SET
+      gens_count = n.count
+    FROM (
+      SELECT
+        c.id,
+        (SELECT COUNT(1) FROM gen g WHERE g.category_id = c.id) AS count
+      FROM
+        category c
+    ) n
+    WHERE
+      c.id = n.id
+      AND c.gens_count != n.count
+    RETURNING 1
+  ),
+  fixed_subcategories AS (
+    UPDATE subcategory s SET
+      gens_count = n.count
+    FROM (
+      SELECT
+        s.id,
+        (
+          SELECT
+            COUNT(1)
+          FROM gen_subcategory gs
+          JOIN gen g
+            ON g.id = gs.gen_id
+          WHERE
+            gs.subcategory_id = s.id
+            AND g.category_id != 99
+        ) AS count
+      FROM
+        subcategory s
+    ) n
+    WHERE
+      s.id = n.id
+      AND s.gens_count != n.count
+    RETURNING 1
+  ),
+  fixed_tags AS (
+    UPDATE tag t SET
+      gens_count = n.count
+    FROM (
+      SELECT
+        t.id,
+        (
+          SELECT
+            COUNT(1)
+          FROM gen_tag gt
+          JOIN gen g
+            ON g.id = gt.gen_id
+          WHERE
+            gt.tag_id = t.id
+            AND g.access = 0
+        ) AS count
+      FROM
+        tag t
+    ) n
+    WHERE
+      t.id = n.id
+      AND t.gens_count != n.count
+    RETURNING 1
+  )
+  SELECT (
+    (SELECT COUNT(1) FROM fixed_categories)
+    + (SELECT COUNT(1) FROM fixed_subcategories)
+    + (SELECT COUNT(1) FROM fixed_tags)
+  )::integer;
+$$ LANGUAGE SQL;
+
+SELECT gen_counts_reconcile();
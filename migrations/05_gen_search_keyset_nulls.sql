@@ -0,0 +1,6 @@
+-- dates can be NULL: search sorts them as -infinity (last under DESC),
+-- keyset cursors compare the same expression
+DROP INDEX IF EXISTS gen_search_access_active_date_updated_gen_id_idx;
+DROP INDEX IF EXISTS gen_search_access_active_date_added_gen_id_idx;
+CREATE INDEX IF NOT EXISTS gen_search_access_active_date_updated_nn_gen_id_idx ON gen_search(access, active, COALESCE(date_updated, '-infinity'::timestamptz) DESC, gen_id DESC);
+CREATE INDEX IF NOT EXISTS gen_search_access_active_date_added_nn_gen_id_idx ON gen_search(access, active, COALESCE(date_added, '-infinity'::timestamptz) DESC, gen_id DESC);
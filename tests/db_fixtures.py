@@ -1,5 +1,6 @@
 from typing import Callable
 from datetime import datetime, timezone
+from pathlib import Path
 import json
 import time
 import pytest
@@ -15,9 +16,10 @@ password_backend = PasslibPasswordBackend()
 
 
 async def init_db(conn: Connection):
-    with open("./migrations/01_init.sql") as f:
-        queries = f.read()
-    await conn.execute(queries)
+    for path in sorted(Path("./migrations").glob("*.sql")):
+        with open(path) as f:
+            queries = f.read()
+        await conn.execute(queries)
     now = datetime.now(tz=timezone.utc)
     await conn.execute(
         """
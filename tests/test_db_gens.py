@@ -78,3 +78,42 @@ async def test_create(
 #         valid_metadata,
 #     )
 #     assert res
+
+
+async def test_add_views(
+    db_conn: Connection,
+    gens_ext: GensExt,
+    model_user_admin: User,
+    valid_head: Head,
+    valid_metadata: Metadata,
+):
+    id = await gens_ext.create(
+        model_user_admin,
+        valid_head,
+        {},
+        {},
+        valid_metadata,
+    )
+    await gens_ext.add_views([id, id + 1], [3, 5])
+    views = await db_conn.fetchval("SELECT views FROM gen WHERE id = $1;", id)
+    assert views == 3
+
+
+async def test_counts(
+    gens_ext: GensExt,
+    model_user_admin: User,
+    valid_head: Head,
+    valid_metadata: Metadata,
+):
+    await gens_ext.create(
+        model_user_admin,
+        valid_head,
+        {},
+        {},
+        valid_metadata,
+    )
+    categories = {c["name"]: c for c in await gens_ext.get_categories()}
+    assert categories["Игры"]["count"] == 1
+    assert categories["Игры"]["subcategories"] == [{"name": "Другое", "count": 1}]
+    assert await gens_ext.get_tags() == [{"name": "tag1", "count": 1}]
+    assert await gens_ext.reconcile_counts() == 0
@@ -74,3 +74,16 @@ async def test_activate_deactivate(
     await lists_ext.activate(id)
     item = await lists_ext.get(id)
     assert item.get("active") is True
+
+
+async def test_get_many(
+    lists_ext: ListsExt,
+    model_user_admin: User,
+    valid_data: dict,
+):
+    id1 = await lists_ext.create(model_user_admin, valid_data)
+    id2 = await lists_ext.create(model_user_admin, valid_data)
+
+    items = await lists_ext.get_many([id1, id2, 99999])
+    assert sorted(item.get("id") for item in items) == [id1, id2]
+    assert all(item.get("user", {}).get("id") == model_user_admin.id for item in items)
@@ -1,9 +1,12 @@
 import pytest
 
+from aioredis import Redis
 from asyncpg import Connection
 
 from app.db.postgres.settings import SettingsExt
+from app.db.redis import RedisCache
 from app.entities.settings import GensSetting
+from app.repo.settings import SettingsRepo, _snapshot
 
 pytestmark = pytest.mark.anyio
 
@@ -25,3 +28,29 @@ async def test_set_setting(settings_ext: SettingsExt):
     await settings_ext.set_setting(setting, value)
     res = await settings_ext.get_setting(setting)
     assert res == value
+
+
+class _DB:
+    def __init__(self, settings: SettingsExt) -> None:
+        self.settings = settings
+
+
+async def test_set_seen_by_other_repo(settings_ext: SettingsExt, cache_conn: Redis):
+    db = _DB(settings_ext)
+    repo = SettingsRepo(db, RedisCache(cache_conn))  # type: ignore
+    other = SettingsRepo(db, RedisCache(cache_conn))  # type: ignore
+    setting = GensSetting.EDITOR_PING_INTERVAL
+
+    await repo.on_startup()
+    assert await cache_conn.get(SettingsRepo.version_key) == "0"
+    assert await other.get(setting) == setting.value
+
+    # the other worker still has the old version, it only gets the message
+    version = _snapshot.version
+    await repo.set(setting, 10)
+    _snapshot.version = version
+    SettingsRepo.invalidate()
+    try:
+        assert await other.get(setting) == 10
+    finally:
+        GensSetting.set_value(setting, setting.value)
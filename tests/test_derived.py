@@ -0,0 +1,84 @@
+import asyncio
+from typing import Any, List
+
+import pytest
+
+from aioredis import Redis
+
+from app.db.derived import DerivedCache
+from app.db.redis import RedisCache
+
+pytestmark = pytest.mark.anyio
+
+KEY = "TEST:derived"
+
+
+class _DB:
+    """
+    background runs jobs right away, tests await them with join
+    """
+
+    def __init__(self) -> None:
+        self.tasks: List[asyncio.Task] = []
+
+    def background(self, job) -> None:
+        self.tasks.append(asyncio.create_task(job(self)))
+
+    async def join(self) -> None:
+        await asyncio.gather(*self.tasks)
+        self.tasks.clear()
+
+
+class _Compute:
+    def __init__(self, delay: float = 0.05) -> None:
+        self.calls = 0
+        self.delay = delay
+
+    async def __call__(self, db: Any) -> int:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.calls
+
+
+@pytest.fixture
+def db():
+    return _DB()
+
+
+@pytest.fixture
+def derived(db: _DB, cache_conn: Redis):
+    return DerivedCache(db, RedisCache(cache_conn))  # type: ignore
+
+
+async def test_cold_key_computed_once(derived: DerivedCache):
+    compute = _Compute()
+    res = await asyncio.gather(
+        *(derived.get(KEY, compute, ttl=60, stale=60) for _ in range(10))
+    )
+    assert res == [1] * 10
+    assert compute.calls == 1
+
+
+async def test_reset_serves_stale_while_refreshing(derived: DerivedCache, db: _DB):
+    compute = _Compute()
+    assert await derived.get(KEY, compute, ttl=60, stale=60) == 1
+
+    await derived.reset(KEY)
+    res = await asyncio.gather(
+        *(derived.get(KEY, compute, ttl=60, stale=60) for _ in range(10))
+    )
+    assert res == [1] * 10
+
+    await db.join()
+    assert compute.calls == 2
+    assert await derived.get(KEY, compute, ttl=60, stale=60) == 2
+
+
+async def test_waiter_computes_after_timeout(derived: DerivedCache, cache_conn: Redis):
+    # another worker holds the lock and never stores the value
+    await cache_conn.set(f"{KEY}:lock", "other", ex=10)
+
+    compute = _Compute(delay=0)
+    res = await derived.get(KEY, compute, ttl=60, stale=60, wait_timeout=0.2)
+    assert res == 1
+    assert compute.calls == 1
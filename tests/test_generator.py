@@ -0,0 +1,71 @@
+from typing import List
+
+import pytest
+
+from app.core.blocks.generator import Generator
+from app.core.blocks.plan import Plan
+
+DRAWS = 200
+
+generator = Generator()
+
+
+def _compile(
+    contents: List[str],
+    sequences: List[List[int]],
+    exceptions: List[List[int]],
+) -> Plan:
+    # end=2 - every choice is followed by a space
+    blocks = [
+        dict(
+            vars=True,
+            before="",
+            slicer="|",
+            content=content,
+            cap=False,
+            after="",
+            end=2,
+        )
+        for content in contents
+    ]
+    body = generator.construct_body(
+        dict(blocks=blocks, sequences=sequences, exceptions=exceptions)
+    )
+    return generator.compile(body)
+
+
+@pytest.mark.parametrize(
+    "contents, sequences, exceptions",
+    [
+        # ExceptionsGenerator
+        (["a|b|c", "a|b|c", "a|b|c"], [], [[1, 2, 3]]),
+        # AdvancedGenerator, same block used up three times
+        (["a|b|c"], [[1, 1, 1]], [[1, 1, 1]]),
+        (["a|b", "a|B"], [[1, 2], [2, 1]], [[1, 2]]),
+    ],
+)
+def test_exceptions_not_repeated(
+    contents: List[str],
+    sequences: List[List[int]],
+    exceptions: List[List[int]],
+):
+    plan = _compile(contents, sequences, exceptions)
+    for _ in range(DRAWS):
+        choices = generator.generate(plan).lower().split()
+        assert len(choices) == len(set(choices))
+
+
+def test_draws_dont_share_used_members():
+    exceptions = [[1, 1, 1]]
+    plan = _compile(["a|b|c"], [[1, 1, 1]], exceptions)
+    members = list(plan.compiled_exceptions.members)
+
+    # a draw that leaked what it used up would leave later draws unexcluded
+    for _ in range(DRAWS):
+        body = plan.body()
+        res = generator._get_generator(body, plan.compiled_exceptions).generate()
+        assert sorted(res.split()) == ["a", "b", "c"]
+
+    assert plan.exceptions == exceptions
+    assert plan.compiled_exceptions.members == members
+    assert all(block.content == ["a", "b", "c"] for block in plan.body().blocks)
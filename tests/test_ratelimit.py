@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from aioredis import Redis
+
+from app.db.ratelimit import (
+    LocalRateLimiter,
+    RateLimiter,
+    RateLimitMode,
+    RateLimitStatus,
+)
+from app.db.redis import RedisCache
+
+pytestmark = pytest.mark.anyio
+
+IP = "127.0.0.1"
+
+
+@pytest.fixture
+def redis(cache_conn: Redis):
+    return RedisCache(cache_conn)
+
+
+@pytest.mark.parametrize(
+    "mode",
+    [RateLimitMode.SLIDING_WINDOW, RateLimitMode.TOKEN_BUCKET],
+)
+async def test_hit(redis: RedisCache, mode: RateLimitMode):
+    limiter = RateLimiter(redis, "test:ratelimit", mode, window=60)
+    for _ in range(3):
+        assert await limiter.hit(IP, 3) == RateLimitStatus.OK
+
+    assert await limiter.hit(IP, 3) == RateLimitStatus.EXCEEDED
+    assert await limiter.hit(IP, 3) == RateLimitStatus.BANNED
+    assert await limiter.hit("127.0.0.2", 3) == RateLimitStatus.OK
+
+
+@pytest.mark.parametrize(
+    "mode",
+    [RateLimitMode.SLIDING_WINDOW, RateLimitMode.TOKEN_BUCKET],
+)
+async def test_hit_cost(redis: RedisCache, mode: RateLimitMode):
+    limiter = RateLimiter(redis, "test:ratelimit", mode, window=60)
+    assert await limiter.hit(IP, 5, 3) == RateLimitStatus.OK
+    assert await limiter.hit(IP, 5, 3) == RateLimitStatus.EXCEEDED
+
+
+async def test_local_hit(redis: RedisCache):
+    limiter = RateLimiter(redis, "test:ratelimit", window=60)
+    local = LocalRateLimiter(share=0.5)
+    # first half is allowed without redis
+    for _ in range(5):
+        assert await local.hit(limiter, IP, 10) == RateLimitStatus.OK
+    assert await redis.keys("test:ratelimit:*") == []
+
+    for _ in range(5):
+        assert await local.hit(limiter, IP, 10) == RateLimitStatus.OK
+
+    assert await local.hit(limiter, IP, 10) == RateLimitStatus.EXCEEDED
+    # ban is remembered locally
+    await redis.delete(f"test:ratelimit_ban:{IP}")
+    assert await local.hit(limiter, IP, 10) == RateLimitStatus.BANNED
+
+
+async def test_local_hit_reported_after_window(redis: RedisCache):
+    limiter = RateLimiter(redis, "test:ratelimit", window=0.2)
+    local = LocalRateLimiter(share=0.5)
+    for _ in range(3):
+        assert await local.hit(limiter, IP, 10) == RateLimitStatus.OK
+    assert await redis.keys("test:ratelimit:*") == []
+
+    # a window later the counted hits go to redis with this one
+    await asyncio.sleep(0.25)
+    assert await local.hit(limiter, IP, 10) == RateLimitStatus.OK
+    counters = await redis.keys("test:ratelimit:*")
+    assert len(counters) == 1
+    assert await redis.get(counters[0]) == "4"
+
+
+async def test_local_hit_ban_from_redis(redis: RedisCache):
+    limiter = RateLimiter(redis, "test:ratelimit", window=60, ban=4)
+    local = LocalRateLimiter(share=0.5)
+    # banned through another worker, 1s left
+    await redis.set(f"test:ratelimit_ban:{IP}", 1, 1)
+    for _ in range(5):
+        await local.hit(limiter, IP, 10)
+    assert await local.hit(limiter, IP, 10) == RateLimitStatus.BANNED
+
+    await redis.delete(f"test:ratelimit_ban:{IP}")
+    assert await local.hit(limiter, IP, 10) == RateLimitStatus.BANNED
+    # remembered for what was left of the ban, not a fresh one
+    await asyncio.sleep(1.1)
+    assert await local.hit(limiter, IP, 10) == RateLimitStatus.OK
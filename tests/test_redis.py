@@ -3,6 +3,7 @@ import pytest
 
 from aioredis import Redis
 
+from app.db.background import BackgroundQueue
 from app.db.redis import RedisCache
 
 pytestmark = pytest.mark.anyio
@@ -56,6 +57,12 @@ async def test_incr(redis: RedisCache):
     assert res == 2
 
 
+async def test_incr_amount(redis: RedisCache):
+    await redis.set(KEY, VALUE, 120)
+    res = await redis.incr(KEY, 5)
+    assert res == 6
+
+
 async def test_decr(redis: RedisCache):
     await redis.set(KEY, VALUE, 120)
     res = await redis.decr(KEY)
@@ -101,3 +108,49 @@ async def test_srem(redis: RedisCache):
     assert await redis.sismember(KEY, value)
     await redis.srem(KEY, value)
     assert not await redis.sismember(KEY, value)
+
+
+async def test_hget_hdel(redis: RedisCache):
+    field = 1
+    assert await redis.hget(KEY, field) is None
+    await redis.conn.hset(KEY, field, VALUE)
+    assert await redis.hget(KEY, field) == VALUE
+    await redis.hdel(KEY, field)
+    assert await redis.hget(KEY, field) is None
+
+
+async def test_pipeline(redis: RedisCache):
+    value = 1
+    pipe = redis.pipeline()
+    pipe.set(KEY, value)
+    pipe.get(KEY)
+    pipe.sadd(f"{KEY}:set", value)
+    pipe.smembers(f"{KEY}:set")
+    pipe.delete(KEY, f"{KEY}:set")
+    _, v, _, members, deleted = await pipe.execute()
+    assert v == str(value)
+    assert members == {str(value)}
+    assert deleted == 2
+    assert await redis.get(KEY) is None
+
+
+async def test_background_queue(db_pool, cache_pool: Redis):
+    queue = BackgroundQueue()
+    coro = cache_pool.set(KEY, VALUE)
+    assert not queue.submit(coro)
+    coro.close()
+
+    queue.start(db_pool, workers=2, maxsize=10)
+    assert queue.submit(cache_pool.set(KEY, VALUE))
+
+    async def job(conn):
+        await conn.fetchval("SELECT 1")
+
+    assert queue.submit_db(job)
+    await queue.stop()
+
+    assert await cache_pool.get(KEY) == VALUE
+    metrics = queue.metrics()
+    assert metrics["submitted"] == 2
+    assert metrics["completed"] == 2
+    assert metrics["queued"] == 0
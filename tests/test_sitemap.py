@@ -0,0 +1,56 @@
+from typing import AsyncIterator
+
+import pytest
+
+from aioredis import Redis
+
+from app.db.redis import RedisCache
+from app.repo.gens import SITEMAP_MAX_URLS, GensRepo
+
+
+pytestmark = pytest.mark.anyio
+
+
+class _Internal:
+    def __init__(self, n: int) -> None:
+        self._n = n
+
+    async def iter_sitemap(self) -> AsyncIterator[int]:
+        for i in range(self._n):
+            yield i
+
+
+class _DB:
+    def __init__(self, n: int) -> None:
+        self.internal = _Internal(n)
+
+
+async def _render(rows: AsyncIterator[int]) -> AsyncIterator[str]:
+    async for row in rows:
+        yield f"<url>{row}</url>"
+
+
+@pytest.mark.parametrize(
+    "n, pages",
+    [
+        (0, 1),
+        (SITEMAP_MAX_URLS, 1),
+        (SITEMAP_MAX_URLS + 1, 2),
+    ],
+)
+async def test_build_sitemap(cache_conn: Redis, n: int, pages: int):
+    db = _DB(n)
+    repo = GensRepo(db, RedisCache(cache_conn))  # type: ignore
+
+    sitemap = await repo._build_sitemap(db, _render)  # type: ignore
+    assert sitemap["pages"] == pages
+
+    counts = []
+    for page in range(sitemap["pages"]):
+        chunks = [c async for c in repo.iter_sitemap_page(sitemap["stamp"], page)]
+        counts.append("".join(chunks).count("<url>"))
+
+    assert sum(counts) == n
+    assert all(c <= SITEMAP_MAX_URLS for c in counts)
+    if n > 0:
+        assert counts[-1] > 0